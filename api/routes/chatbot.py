@@ -1,7 +1,9 @@
+import json
 from fastapi import APIRouter
-from typing import List, Dict
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Optional
 from pydantic import BaseModel
-from services.chatbot import chat
+from services.chatbot import achat, astream_chat
 
 router = APIRouter()
 
@@ -16,11 +18,38 @@ class HistoryMessage(Message):
 class ChatPayload(BaseModel):
     new_message: Message
     history: List[HistoryMessage]
+    # Restrict retrieval to one branch's menu (plus shared FAQs / reviews)
+    branch_id: Optional[int] = None
 
 
 @router.post("/chatbot")
-def chatbot_api(payload: ChatPayload):
-    return chat(
+async def chatbot_api(payload: ChatPayload):
+    return await achat(
         payload.new_message.message,
-        payload.history
+        payload.history,
+        payload.branch_id
+    )
+
+
+# === Server-Sent Events: token events while generating, then the full message ===
+async def _sse_events(payload: ChatPayload):
+    try:
+        async for event in astream_chat(payload.new_message.message, payload.history, payload.branch_id):
+            name = "token" if "token" in event else "message"
+            data = event["token"] if name == "token" else event["message"]
+            yield f"event: {name}\ndata: {json.dumps(data)}\n\n"
+    except Exception as e:
+        print(f"Chatbot stream error: {e}")
+        yield f"event: error\ndata: {json.dumps({'error': 'Failed to generate a reply'})}\n\n"
+
+
+@router.post("/chatbot/stream")
+async def chatbot_stream_api(payload: ChatPayload):
+    return StreamingResponse(
+        _sse_events(payload),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
     )
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, Path
+from typing import Literal
+from fastapi import APIRouter, Depends, Path, Query
 from schemas.recommend import RecommendationRequest
 from services.recommendation import generate_recommendation, InternalQuestion
 from core.security import verify_bearer_token
@@ -14,6 +15,8 @@ router = APIRouter()
 async def recommend(
     payload: RecommendationRequest,
     branch_id: int,
+    # "fast" skips the LLM and uses the local deal optimizer
+    mode: Literal["llm", "fast"] = Query("llm"),
 ):
     # === Convert user preferences to internal representation ===
     q = InternalQuestion(payload.preferences)
@@ -21,7 +24,8 @@ async def recommend(
     # === Generate recommendations asynchronously ===
     deals = await generate_recommendation(
         branch_id,
-        q
+        q,
+        mode
     )
 
     # === Debug ===
@@ -31,7 +35,8 @@ async def recommend(
     return {
         "branch_id": branch_id,
         "number_of_people": q.peoples,
-        "meal_type": q.meal_time,
-        "budget_level": q.budget,
+        # As sent by the client (q holds the normalized values used internally)
+        "meal_type": payload.preferences.meal_type,
+        "budget_level": payload.preferences.budget_level,
         "deals": deals
     }
\ No newline at end of file
@@ -1,37 +1,310 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import List, Dict, Any, Literal
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
+from typing import List, Dict, Any, Literal, Optional, Tuple
+from datetime import date
+import asyncio
 import json
 
-from db.database import fetch_menu_with_reviews
-from cache.redis_cache import get_reviews_menu_from_cache, store_reviews_menu_in_cache
-from services.reviews import analyze_sentiment
+from db.database import add_review, fetch_menu_with_reviews
+from cache.local_cache import LRUCache
+from cache.redis_cache import (
+    content_hash,
+    get_reviews_menu_and_etag_from_cache,
+    get_reviews_menu_etag,
+    store_reviews_menu_in_cache,
+)
+from core.config import settings
+from core.security import verify_bearer_token
+from schemas.reviews import ReviewCreate
+from services.review_events import Subscription, review_events
+from services.reviews import (
+    SentimentIndex,
+    analyze_sentiment,
+    annotate_sentiments,
+    filter_reviews_menu,
+    get_sentiment_index,
+    paginate_items,
+    parse_cursor,
+    parse_fields,
+    project_items,
+    review_cursor,
+)
 
 # === Initialize API Router ===
 router = APIRouter()
 
-# === GET /reviews/menu endpoint ===
-@router.get("/reviews/menu")
-async def get_menu_with_reviews():
+# === Load Reviews Menu (cache first, DB fallback annotated with sentiment, then cached) ===
+async def load_reviews_menu_with_etag() -> Tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
     """
-    Fetch menu items with reviews.
-    Uses cache first, falls back to DB, then stores in cache.
+    Reviews menu and the content hash of that version (None when there is no menu).
     """
-    # Try cache first
-    menu = await get_reviews_menu_from_cache()
+    menu, etag = await get_reviews_menu_and_etag_from_cache()
     
     if menu is None:
         # Fallback to DB
         menu = await fetch_menu_with_reviews()
         
-        # Store in cache
+        # Store in cache with sentiment computed once per review
         if menu:
-            await store_reviews_menu_in_cache(menu)
+            annotate_sentiments(menu)
+            etag = await store_reviews_menu_in_cache(menu)
+    elif annotate_sentiments(menu):
+        # Cached before reviews carried sentiment: store the annotated copy
+        etag = await store_reviews_menu_in_cache(menu)
+    
+    return menu, etag
+
+async def load_reviews_menu():
+    menu, _ = await load_reviews_menu_with_etag()
+    return menu
+
+# === Encoded /reviews/menu Responses ===
+# Keyed by ETag, which already covers the menu version and the query, so an
+# entry never goes stale; the TTL only bounds memory held for old versions
+_menu_responses = LRUCache(settings.REVIEWS_MENU_RESPONSE_CACHE_ITEMS, settings.REDIS_TTL)
+
+# Bump when the response shape changes so clients do not revalidate old bodies
+REVIEWS_MENU_FORMAT = "1"
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match uses weak comparison: W/"x" matches "x"
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        tag.strip().removeprefix("W/") == f'"{etag}"'
+        for tag in if_none_match.split(",")
+    )
+
+def _cache_headers(etag: str) -> Dict[str, str]:
+    # no-cache: clients may keep the body but must revalidate each poll
+    return {"ETag": f'"{etag}"', "Cache-Control": "no-cache"}
+
+# === GET /reviews/menu endpoint ===
+@router.get("/reviews/menu")
+async def get_menu_with_reviews(
+    request: Request,
+    category: Optional[str] = None,
+    item_id: Optional[int] = None,
+    sentiment: Optional[Literal["positive", "negative", "neutral"]] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    min_stars: Optional[int] = Query(None, ge=1, le=5),
+    # Comma-separated item fields, "reviews.<field>" for review fields
+    fields: Optional[str] = None,
+    # next_cursor of the previous page
+    cursor: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=settings.REVIEWS_MENU_MAX_LIMIT),
+):
+    """
+    Fetch menu items with reviews.
+    Uses cache first, falls back to DB, then stores in cache.
+    Each review carries its precomputed "sentiment" and "star_rating".
+    
+    Without parameters the whole menu is returned. Filters narrow items
+    (category, item_id) and reviews (sentiment, date range, min_stars);
+    `limit` pages over items by id, continuing after `cursor` = the previous
+    "next_cursor" (null on the last page).
+    
+    The strong ETag is derived from the cached menu's content hash and the
+    query, so a matching If-None-Match is answered 304 without loading the
+    menu, and encoded bodies are reused per ETag instead of re-serialized.
+    """
+    item_fields, review_fields = parse_fields(fields)
+    query = (
+        category.lower() if category else None,
+        item_id,
+        sentiment,
+        date_from.isoformat() if date_from else None,
+        date_to.isoformat() if date_to else None,
+        min_stars,
+        item_fields,
+        review_fields,
+        cursor,
+        limit
+    )
+    
+    def response_etag(menu_etag: str) -> str:
+        return content_hash(f"{REVIEWS_MENU_FORMAT}|{menu_etag}|{query!r}".encode())
+    
+    # Fast path: one small cache read, no menu decode or serialization
+    menu_etag = await get_reviews_menu_etag()
+    if menu_etag is not None:
+        etag = response_etag(menu_etag)
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=_cache_headers(etag))
+        entry = _menu_responses.get(etag)
+        if entry is not None:
+            return Response(entry.value, media_type="application/json", headers=_cache_headers(etag))
+    
+    menu, menu_etag = await load_reviews_menu_with_etag()
+    
+    items = filter_reviews_menu(
+        menu or [],
+        category=category,
+        item_id=item_id,
+        sentiment=sentiment,
+        date_from=query[3],
+        date_to=query[4],
+        min_stars=min_stars
+    )
+    page, next_cursor = paginate_items(items, cursor, limit)
+    body = json.dumps(
+        {
+            "status": "success",
+            "menu": project_items(page, item_fields, review_fields),
+            "next_cursor": next_cursor
+        },
+        ensure_ascii=False,
+        separators=(",", ":")
+    ).encode("utf-8")
+    
+    etag = response_etag(menu_etag) if menu_etag is not None else content_hash(body)
+    _menu_responses.set(etag, body)
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=_cache_headers(etag))
+    return Response(body, media_type="application/json", headers=_cache_headers(etag))
+
+# === WebSocket Frame Helpers ===
+def _review_message(item: Dict[str, Any], review: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "item_id": item.get("id"),
+        "item_name": item.get("name"),
+        "item_category": item.get("category"),
+        "review": {
+            "id": review.get("id"),
+            "text": review.get("review"),
+            "customer_name": review.get("customer_name"),
+            "date": review.get("date"),
+            "sentiment": review.get("sentiment"),
+            "star_rating": review.get("star_rating")
+        }
+    }
+
+def _batch_size(requested: Any) -> int:
+    if isinstance(requested, int) and not isinstance(requested, bool) and requested > 0:
+        return min(requested, settings.REVIEWS_WS_MAX_BATCH_SIZE)
+    return max(1, settings.REVIEWS_WS_BATCH_SIZE)
+
+def _batch_frame(parts: List[str], cursor: str) -> str:
+    # Messages are already JSON encoded; join them instead of re-encoding the batch
+    return '{"reviews":[' + ",".join(parts) + '],"cursor":' + json.dumps(cursor) + "}"
+
+async def _send_frame(websocket: WebSocket, text: str):
+    """
+    Send one text frame, waiting for the client to drain it (backpressure).
+    Raises asyncio.TimeoutError if the client does not keep up.
+    """
+    await asyncio.wait_for(websocket.send_text(text), timeout=settings.REVIEWS_WS_SEND_TIMEOUT)
+
+# === POST /reviews endpoint (ingest one review, publish it to live streams) ===
+# Serializes rebuilding the cached reviews menu within this worker
+_ingest_lock = asyncio.Lock()
+
+def _max_review_id(menu: List[Dict[str, Any]]) -> int:
+    return max(
+        (review.get("id") or 0 for item in menu for review in item.get("reviews") or []),
+        default=0
+    )
+
+@router.post(
+    "/reviews",
+    status_code=201,
+    dependencies=[Depends(verify_bearer_token)]
+)
+async def create_review(payload: ReviewCreate):
+    """
+    Add a review to a menu item.
+    Sentiment is analyzed once here; the annotated review is stored durably
+    (data/reviews.jsonl, merged into fetch_menu_with_reviews) before the
+    cached reviews menu is rebuilt, so it survives cache expiry and Redis
+    restarts. It is then published on REVIEWS_CHANNEL to every worker's live
+    /reviews/ws/sentiment subscribers of that sentiment.
+    """
+    menu = await load_reviews_menu() or []
+    if not any(item.get("id") == payload.item_id for item in menu):
+        raise HTTPException(status_code=404, detail="Menu item not found")
+    
+    review = {
+        "review": payload.review,
+        "customer_name": payload.customer_name,
+        "date": (payload.date or date.today()).isoformat()
+    }
+    review.update(analyze_sentiment(payload.review))
+    review = await add_review(payload.item_id, review, min_id=_max_review_id(menu))
+    
+    # Rebuilt from the store rather than patched, so reviews posted on other
+    # workers are kept; new objects, so streams in progress keep the previous menu and index
+    async with _ingest_lock:
+        menu = await fetch_menu_with_reviews()
+        annotate_sentiments(menu)
+        await store_reviews_menu_in_cache(menu)
+    item = next(item for item in menu if item.get("id") == payload.item_id)
+    
+    message = _review_message(item, review)
+    cursor = review_cursor(review)
+    try:
+        await review_events.publish(message, cursor)
+    except Exception as e:
+        # Stored either way: any client resuming from an earlier cursor receives it
+        print(f"Review publish error: {e}")
     
     return {
         "status": "success",
-        "menu": menu or []
+        "review": message,
+        "cursor": cursor
     }
 
+# === Live Review Streaming ===
+async def _close_on_disconnect(websocket: WebSocket, subscription: Subscription):
+    try:
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        subscription.close()
+
+async def _stream_live(
+    websocket: WebSocket,
+    subscription: Subscription,
+    index: SentimentIndex,
+    batch_size: int,
+    cursor: Any
+):
+    """
+    Forward newly published reviews of the subscription's sentiment until the
+    client disconnects. Reviews already streamed from `index` are skipped.
+    Frames carry the same review id cursor as the snapshot; it only moves
+    forward, so resuming with it never replays what was sent.
+    """
+    watcher = asyncio.create_task(_close_on_disconnect(websocket, subscription))
+    try:
+        while True:
+            events = await subscription.next_batch(batch_size)
+            if not events:
+                break
+            events = [e for e in events if not index.contains(subscription.sentiment, parse_cursor(e.cursor))]
+            if not events:
+                continue
+            
+            # Ids are assigned in order, but workers may publish slightly out of order
+            last_id = max(parse_cursor(e.cursor) for e in events)
+            if cursor is None or last_id > parse_cursor(cursor):
+                cursor = str(last_id)
+            if batch_size == 1:
+                await _send_frame(websocket, json.dumps(dict(events[0].message, cursor=cursor)))
+            else:
+                await _send_frame(websocket, _batch_frame([e.encoded for e in events], cursor))
+        
+        if subscription.overflowed:
+            # Fell REVIEWS_LIVE_QUEUE_SIZE events behind: reconnect with the cursor to catch up
+            await websocket.send_json({
+                "error": "Client too slow for live reviews",
+                "cursor": cursor
+            })
+            await websocket.close(code=1013)
+    finally:
+        watcher.cancel()
+
 # === WebSocket endpoint /reviews/ws/sentiment ===
 @router.websocket("/reviews/ws/sentiment")
 async def websocket_sentiment(websocket: WebSocket):
@@ -40,12 +313,26 @@ async def websocket_sentiment(websocket: WebSocket):
     
     Client sends:
     {
-        "filter": "positive" | "negative"
+        "filter": "positive" | "negative",
+        "batch_size": 50,          # optional: reviews per frame (default REVIEWS_WS_BATCH_SIZE)
+        "cursor": "8",             # optional: resume after this review
+        "live": true               # optional: keep streaming newly posted reviews
     }
     
-    Server streams back only matching sentiment reviews.
+    Server streams back only matching sentiment reviews. With batch_size 1 each
+    frame is one review message; otherwise frames are {"reviews": [...]}, also
+    flushed early at REVIEWS_WS_BATCH_BYTES. Reviews stream in review id
+    order and every frame and the completion message carry a "cursor" (the
+    last review id sent) to reconnect with; resuming sends every matching
+    review with a greater id, including ones posted later for any item. Each frame is awaited before
+    the next is built, so a slow client is never buffered for; one that stalls
+    longer than REVIEWS_WS_SEND_TIMEOUT is disconnected.
+    
+    With "live", the socket stays open after the completion message and
+    receives reviews posted to /reviews from then on, in the same frame format.
     """
     await websocket.accept()
+    subscription = None
     
     try:
         # Receive filter from client
@@ -61,16 +348,23 @@ async def websocket_sentiment(websocket: WebSocket):
             await websocket.close()
             return
         
-        # Load menu data from cache or DB
-        menu = await get_reviews_menu_from_cache()
+        batch_size = _batch_size(filter_data.get("batch_size"))
+        try:
+            after_id = parse_cursor(filter_data.get("cursor"))
+        except ValueError:
+            await websocket.send_json({
+                "error": "Invalid cursor. Use the cursor of a previous frame"
+            })
+            await websocket.close()
+            return
+        cursor = None if after_id is None else str(after_id)
         
-        if menu is None:
-            # Fallback to DB
-            menu = await fetch_menu_with_reviews()
-            
-            # Store in cache
-            if menu:
-                await store_reviews_menu_in_cache(menu)
+        # Subscribe before loading the menu so no review posted in between is missed
+        if filter_data.get("live") is True:
+            subscription = await review_events.subscribe(filter_type)
+        
+        # Load menu data from cache or DB
+        menu, menu_etag = await load_reviews_menu_with_etag()
         
         if not menu:
             await websocket.send_json({
@@ -79,46 +373,46 @@ async def websocket_sentiment(websocket: WebSocket):
             await websocket.close()
             return
         
-        # Process each menu item and its reviews
-        for item in menu:
-            if "reviews" not in item or not item["reviews"]:
+        # Matching reviews come from the per-sentiment index (annotated once, no re-analysis),
+        # encoded one at a time as the stream advances
+        index = get_sentiment_index(menu, menu_etag)
+        parts: List[str] = []
+        size = 0
+        for item, review in index.iter_after(filter_type, after_id):
+            message = _review_message(item, review)
+            cursor = review_cursor(review)
+            
+            if batch_size == 1:
+                message["cursor"] = cursor
+                await _send_frame(websocket, json.dumps(message))
                 continue
             
-            # Analyze sentiment for each review
-            for review in item["reviews"]:
-                review_text = review.get("review", "")
-                if not review_text:
-                    continue
-                
-                # Analyze sentiment
-                sentiment_result = analyze_sentiment(review_text)
-                review_sentiment = sentiment_result.get("sentiment")
-                
-                # Only send reviews that match the filter
-                if review_sentiment == filter_type:
-                    # Send matching review with sentiment analysis
-                    response = {
-                        "item_id": item.get("id"),
-                        "item_name": item.get("name"),
-                        "item_category": item.get("category"),
-                        "review": {
-                            "id": review.get("id"),
-                            "text": review_text,
-                            "customer_name": review.get("customer_name"),
-                            "date": review.get("date"),
-                            "sentiment": review_sentiment,
-                            "star_rating": sentiment_result.get("star_rating")
-                        }
-                    }
-                    
-                    await websocket.send_json(response)
+            encoded = json.dumps(message)
+            parts.append(encoded)
+            size += len(encoded)
+            if len(parts) >= batch_size or size >= settings.REVIEWS_WS_BATCH_BYTES:
+                await _send_frame(websocket, _batch_frame(parts, cursor))
+                parts, size = [], 0
+        
+        if parts:
+            await _send_frame(websocket, _batch_frame(parts, cursor))
         
         # Send completion message
         await websocket.send_json({
             "status": "complete",
-            "message": f"Finished streaming {filter_type} reviews"
+            "message": f"Finished streaming {filter_type} reviews",
+            "cursor": cursor
         })
         
+        if subscription is not None:
+            await _stream_live(websocket, subscription, index, batch_size, cursor)
+        
+    except asyncio.TimeoutError:
+        print("WebSocket client too slow, closing stream")
+        try:
+            await websocket.close(code=1013)
+        except Exception:
+            pass
     except json.JSONDecodeError:
         await websocket.send_json({
             "error": "Invalid JSON format"
@@ -132,4 +426,6 @@ async def websocket_sentiment(websocket: WebSocket):
             "error": f"Server error: {str(e)}"
         })
         await websocket.close()
-
+    finally:
+        if subscription is not None:
+            review_events.unsubscribe(subscription)
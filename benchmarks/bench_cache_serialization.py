@@ -0,0 +1,81 @@
+"""
+Cache hit-path decode cost: legacy JSON vs cache.serializers codecs.
+
+The legacy path is what a hit used to cost with decode_responses=True:
+UTF-8 decode of the Redis reply followed by json.loads. Each codec is measured
+on a real branch menu from data/menu.csv, a synthetic large menu and the
+reviews menu, reporting payload size, decode time per hit and peak memory
+allocated while decoding.
+
+Usage:
+    python -m benchmarks.bench_cache_serialization [--items 2000] [--number 2000]
+"""
+import argparse
+import asyncio
+import json
+import timeit
+import tracemalloc
+
+from cache.serializers import CacheSerializer, msgpack, payload_codec
+from db.database import fetch_menu, fetch_menu_with_reviews
+
+
+def synthetic_menu(items: int):
+    return [
+        {
+            "id": i,
+            "branch": 1,
+            "name": f"Item number {i}",
+            "category": f"Category {i % 20}",
+            "portion": "Regular",
+            "price": 100 + i,
+            "serves": 1 + i % 3,
+        }
+        for i in range(items)
+    ]
+
+
+def peak_kib(fn) -> float:
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def bench(name: str, value, number: int):
+    legacy_payload = json.dumps(value, default=str).encode("utf-8")
+    candidates = [("legacy json (decode+loads)", legacy_payload, lambda data: json.loads(data.decode("utf-8")))]
+    codecs = ["columnar", "json"] + (["msgpack"] if msgpack is not None else [])
+    for codec in codecs:
+        serializer = CacheSerializer([codec])
+        payload = serializer.dumps(value)
+        if payload_codec(payload) != codec:
+            continue  # codec does not accept this value (e.g. columnar for reviews)
+        candidates.append((codec, payload, serializer.loads))
+
+    print(f"\n{name}")
+    for label, payload, decode in candidates:
+        assert decode(payload) == json.loads(legacy_payload)
+        seconds = timeit.timeit(lambda: decode(payload), number=number) / number
+        print(
+            f"  {label:<28} size={len(payload):8d} B  decode={seconds * 1e6:9.1f} us/hit  "
+            f"peak={peak_kib(lambda: decode(payload)):8.1f} KiB"
+        )
+
+
+def main(args):
+    branch_menu = asyncio.run(fetch_menu(1))
+    reviews_menu = asyncio.run(fetch_menu_with_reviews())
+    if msgpack is None:
+        print("msgpack not installed: msgpack codec skipped")
+    bench(f"menu:1 ({len(branch_menu)} items)", branch_menu, args.number)
+    bench(f"synthetic menu ({args.items} items)", synthetic_menu(args.items), max(1, args.number // 20))
+    bench("reviews_menu", reviews_menu, args.number)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--number", type=int, default=2000)
+    main(parser.parse_args())
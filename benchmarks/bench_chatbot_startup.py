@@ -0,0 +1,57 @@
+"""
+Worker start-up cost of the chatbot module.
+
+Before: importing services.chatbot built the embedding model, loaded the FAISS
+index and created the Groq client at import time, so every worker paid for it
+before serving anything. That cost is reproduced as "import + load_runtime()".
+After: importing the module only builds the prompt; the runtime loads lazily
+or in the background.
+
+Each measurement runs in a fresh interpreter. Usage:
+    python -m benchmarks.bench_chatbot_startup [--runs 3]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    "import services.chatbot (lazy)": "import services.chatbot",
+    "import main (lazy)": "import main",
+    "import + load_runtime() (eager)": "import services.chatbot as c; c.load_runtime()",
+}
+
+TIMER = (
+    "import time; _t = time.perf_counter(); {code}; "
+    "print(time.perf_counter() - _t)"
+)
+
+
+def measure(code: str) -> float:
+    out = subprocess.run(
+        [sys.executable, "-c", TIMER.format(code=code)],
+        cwd=BASE_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def main(args):
+    for name, code in SCENARIOS.items():
+        try:
+            samples = [measure(code) for _ in range(args.runs)]
+        except subprocess.CalledProcessError as e:
+            print(f"{name:<34} failed: {e.stderr.strip().splitlines()[-1]}")
+            continue
+        print(f"{name:<34} median={statistics.median(samples):7.3f}s  min={min(samples):7.3f}s  runs={args.runs}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    main(parser.parse_args())
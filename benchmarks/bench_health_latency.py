@@ -0,0 +1,141 @@
+"""
+/health latency during a burst of menu cache misses.
+
+Compares the original data layer (csv.DictReader over the whole file on the
+event loop, on every miss) with db.database.fetch_menu (one load in the I/O
+thread pool, then in-memory lookups). While the burst runs, /health is probed
+every few milliseconds and its p50/p99/max latency is reported.
+
+Usage:
+    python -m benchmarks.bench_health_latency [--branches 300] [--items 400] [--misses 50]
+
+Requires fastapi and httpx.
+"""
+import argparse
+import asyncio
+import csv
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+from fastapi import FastAPI
+
+import db.database as database
+from db.menu_store import MenuStore
+
+
+# === Original Implementation (baseline) ===
+async def legacy_fetch_menu(path: str, branch: int):
+    results = []
+    with open(path, mode='r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            try:
+                row_branch = int(row['branch'])
+            except ValueError:
+                continue
+            if row_branch == branch:
+                results.append({
+                    "id": int(row['id']),
+                    "branch": int(row['branch']),
+                    "name": row['name'],
+                    "category": row['category'],
+                    "portion": row['portion'],
+                    "price": int(row['price']),
+                    "serves": int(row['serves'])
+                })
+    return results
+
+
+def write_menu(path: str, branches: int, items: int):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "branch", "name", "category", "portion", "price", "serves"])
+        row_id = 1
+        for branch in range(1, branches + 1):
+            for i in range(items):
+                writer.writerow([row_id, branch, f"Item {i}", f"Category {i % 20}", "Regular", 100 + i, 1 + i % 3])
+                row_id += 1
+
+
+def build_app(fetch) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/health")
+    def health():
+        return {"status": "ok"}
+
+    @app.get("/menu/{branch}")
+    async def menu(branch: int):
+        return {"count": len(await fetch(branch))}
+
+    return app
+
+
+async def run_burst(app: FastAPI, branches: int, misses: int, probe_interval: float):
+    transport = httpx.ASGITransport(app=app)
+    latencies = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def probe(stop: asyncio.Event):
+            while not stop.is_set():
+                start = time.perf_counter()
+                await client.get("/health")
+                latencies.append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(probe_interval)
+
+        stop = asyncio.Event()
+        prober = asyncio.create_task(probe(stop))
+        await asyncio.sleep(probe_interval * 5)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            client.get(f"/menu/{1 + i % branches}") for i in range(misses)
+        ))
+        burst_ms = (time.perf_counter() - started) * 1000
+
+        stop.set()
+        await prober
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return {
+        "burst_ms": burst_ms,
+        "probes": len(latencies),
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": p99,
+        "max_ms": latencies[-1],
+    }
+
+
+def report(name: str, result: dict):
+    print(
+        f"{name:<28} burst={result['burst_ms']:8.1f}ms probes={result['probes']:4d} "
+        f"health p50={result['p50_ms']:6.2f}ms p99={result['p99_ms']:7.2f}ms max={result['max_ms']:7.2f}ms"
+    )
+
+
+async def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "menu.csv")
+        write_menu(path, args.branches, args.items)
+        print(f"menu.csv: {args.branches * args.items} rows, {os.path.getsize(path) / 1e6:.1f} MB, {args.misses} concurrent misses")
+
+        legacy = build_app(lambda branch: legacy_fetch_menu(path, branch))
+        report("baseline (CSV scan on loop)", await run_burst(legacy, args.branches, args.misses, args.probe_interval))
+
+        # Fresh, unloaded store: the burst pays the one cold load in the I/O pool
+        database.menu_store = MenuStore(path)
+        current = build_app(database.fetch_menu)
+        report("menu store (cold, off-loop)", await run_burst(current, args.branches, args.misses, args.probe_interval))
+        report("menu store (warm)", await run_burst(current, args.branches, args.misses, args.probe_interval))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--branches", type=int, default=300)
+    parser.add_argument("--items", type=int, default=400)
+    parser.add_argument("--misses", type=int, default=50)
+    parser.add_argument("--probe-interval", type=float, default=0.005)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,150 @@
+"""
+Per-request overhead of creating the Groq client and prompt for /recommend.
+
+Before: get_groq_recommendations built a new ChatGroq (new HTTP client, new
+connection) and re-parsed the recommendation ChatPromptTemplate on every call.
+After: services.llm_clients.get_chat_model returns a shared client backed by a
+pooled keep-alive HTTP client, and RECOMMENDATION_PROMPT is built once.
+
+The LLM is replaced by a local HTTP server returning a canned completion, so
+the numbers isolate client / connection / template overhead. Against the real
+API each new connection also pays DNS + TLS, so the gap is larger there.
+
+Usage:
+    python -m benchmarks.bench_llm_clients [--requests 200] [--concurrency 8]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_groq import ChatGroq
+
+from core.config import settings
+import services.llm_clients as llm_clients
+import services.recommendation as recommendation
+
+COMPLETION = json.dumps({
+    "id": "bench",
+    "object": "chat.completion",
+    "created": 0,
+    "model": recommendation.RECOMMENDATION_MODEL,
+    "choices": [{
+        "index": 0,
+        "message": {"role": "assistant", "content": "{\"recommendations\": []}"},
+        "finish_reason": "stop",
+    }],
+    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+}).encode()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = set()
+
+    def do_POST(self):
+        self.connections.add(self.client_address)
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(COMPLETION)))
+        self.end_headers()
+        self.wfile.write(COMPLETION)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Preferences:
+    peoples = 4
+    meal_time = "dinner"
+    mood = "cheesy"
+    spice_lvl = "medium"
+    avoid_anything = ""
+    budget = "medium"
+
+
+# === Request Implementations ===
+async def legacy_call(base_url: str, messages):
+    llm = ChatGroq(
+        groq_api_key="bench",
+        model_name=recommendation.RECOMMENDATION_MODEL,
+        temperature=0.7,
+    )
+    prompt = ChatPromptTemplate.from_messages(messages)
+    formatted = prompt.format_messages(**_format_args())
+    return (await llm.ainvoke(formatted)).content
+
+
+async def pooled_call(base_url: str, _messages):
+    llm = llm_clients.get_chat_model(recommendation.RECOMMENDATION_MODEL, temperature=0.7)
+    formatted = recommendation.RECOMMENDATION_PROMPT.format_messages(**_format_args())
+    return (await llm.ainvoke(formatted)).content
+
+
+def _format_args():
+    p = _Preferences()
+    return dict(
+        peoples=p.peoples, meal_time=p.meal_time, mood=p.mood, spice_lvl=p.spice_lvl,
+        avoid_anything=p.avoid_anything or "None", budget=p.budget,
+        ideal_budget=3360, hard_budget=4368, filtered_items="[]",
+    )
+
+
+async def run(name: str, call, base_url: str, messages, requests: int, concurrency: int):
+    _Handler.connections = set()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await call(base_url, messages)
+            latencies.append(time.perf_counter() - start)
+
+    await call(base_url, messages)  # warm imports / first connection
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(
+        f"{name:<30} total={elapsed:7.3f}s  "
+        f"p50={statistics.median(latencies) * 1000:7.2f}ms  "
+        f"p99={latencies[int(len(latencies) * 0.99) - 1] * 1000:7.2f}ms  "
+        f"connections={len(_Handler.connections)}"
+    )
+
+
+async def main(args):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    # Handler threads block on idle keep-alive sockets; don't wait for them at exit
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    # Point both implementations at the local server
+    os.environ["GROQ_API_BASE"] = base_url
+    settings.GROQ_API_KEY = "bench"
+
+    messages = [
+        ("system", recommendation.RECOMMENDATION_PROMPT.messages[0].prompt.template),
+        ("human", recommendation.RECOMMENDATION_PROMPT.messages[1].prompt.template),
+    ]
+    try:
+        await run("new client + template / call", legacy_call, base_url, messages, args.requests, args.concurrency)
+        await run("shared client + template", pooled_call, base_url, messages, args.requests, args.concurrency)
+    finally:
+        await llm_clients.aclose_clients()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,133 @@
+"""
+Candidate selection cost for /recommend as menus grow.
+
+Before: filter_items_by_meal_time scanned the menu list per request and
+mood_match / spice_match rebuilt their keyword dicts and lowercased every dish
+name per call. After: services.menu_features builds a feature matrix once per
+menu object and a request is a few boolean masks and one weighted sum.
+
+Both sides compute the same thing: eligible items (meal time, restrictions)
+and a preference score per item. Synthetic menus of increasing size.
+
+Usage:
+    python -m benchmarks.bench_menu_scoring [--sizes 100,1000,5000] [--repeat 200]
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from services.deal_optimizer import eligible_mask, score_items
+from services.menu_features import MenuFeatures
+from services.recommendation import MEAL_PRIORITY, InternalQuestion
+
+CATEGORIES = ["Pizza", "Burger", "Pasta", "Salad", "Sandwich", "Dessert", "Beverage", "Sides", "Appetizer", "BBQ"]
+WORDS = ["Cheese", "Spicy", "Hot", "Mild", "Regular", "Grilled", "Chicken", "Beef", "Veggie", "Sweet", "Classic"]
+
+
+# === Original Implementation (baseline) ===
+def legacy_mood_match(name, mood):
+    keywords = {
+        "spicy_craving": ["spicy", "hot"],
+        "cheesy_mood": ["cheese"],
+        "sweet_craving": ["sweet", "dessert"],
+        "healthy_choice": ["salad", "grill"],
+        "heavy_meal": ["karahi", "biryani"],
+        "light_meal": ["soup", "salad"]
+    }
+    name_lower = name.lower()
+    for word in keywords.get(mood, []):
+        if word in name_lower:
+            return 1
+    return 0
+
+
+def legacy_spice_match(name, spice):
+    levels = {
+        "low": ["mild"],
+        "medium": ["regular"],
+        "high": ["hot", "spicy"]
+    }
+    name_lower = name.lower()
+    for word in levels.get(spice, []):
+        if word in name_lower:
+            return 1
+    return 0
+
+
+def legacy_select(menu, q, restrictions):
+    priority = MEAL_PRIORITY.get(q.meal_time)
+    items = [item for item in menu if item["category"] in priority] or menu
+    scored = []
+    for item in items:
+        text = f"{item['name']} {item['category']}".lower()
+        if any(term in text for term in restrictions):
+            continue
+        score = 1.0 + 2.0 * legacy_mood_match(item["name"], "cheesy_mood")
+        score += 2.0 * ("cheesy" in text)
+        score += legacy_spice_match(item["name"], q.spice_lvl)
+        score += 0.5 * (item["category"] in priority)
+        scored.append((item, score))
+    return scored
+
+
+def vectorized_select(features, q):
+    mask = eligible_mask(features, q)
+    scores = score_items(features, q, MEAL_PRIORITY.get(q.meal_time, []))
+    return np.flatnonzero(mask), scores
+
+
+class _Preferences:
+    number_of_people = 4
+    craving_type = "cheesy"
+    spice_level = "high"
+    dietary_restrictions = "beef"
+    budget_level = "medium"
+    meal_type = "dinner"
+
+
+def synthetic_menu(size: int, seed: int = 7):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": i,
+            "branch": 1,
+            "name": f"{rng.choice(WORDS)} {rng.choice(WORDS)} {rng.choice(CATEGORIES)}",
+            "category": rng.choice(CATEGORIES),
+            "portion": "Regular",
+            "price": rng.randint(40, 900),
+            "serves": rng.randint(1, 4),
+        }
+        for i in range(size)
+    ]
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main(args):
+    q = InternalQuestion(_Preferences())
+    for size in [int(s) for s in args.sizes.split(",")]:
+        menu = synthetic_menu(size)
+        start = time.perf_counter()
+        features = MenuFeatures(menu)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        legacy = timed(lambda: legacy_select(menu, q, ["beef"]), args.repeat)
+        vectorized = timed(lambda: vectorized_select(features, q), args.repeat)
+        print(
+            f"items={size:<6} legacy={legacy:9.1f}us  vectorized={vectorized:8.1f}us  "
+            f"speedup={legacy / vectorized:5.1f}x  (one-time feature build {build_ms:.1f}ms)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100,1000,5000")
+    parser.add_argument("--repeat", type=int, default=200)
+    main(parser.parse_args())
@@ -0,0 +1,120 @@
+"""
+Review sentiment analysis throughput.
+
+Before: analyze_sentiment built six pattern strings per call and ran
+re.findall six times over the lowercased review (relying on the re module's
+pattern cache). After: services.reviews.SentimentEngine compiles one combined
+pattern at import and scores both polarities in a single scan;
+analyze_many batches a list of reviews.
+
+The legacy function is reproduced verbatim and every result is checked for
+agreement before timing. Synthetic corpus mixes keywords, ratings like
+"5 stars" / "2/10", near-misses ("badge", "12/10") and neutral filler.
+
+Usage:
+    python -m benchmarks.bench_sentiment [--reviews 100000] [--seed 7]
+"""
+import argparse
+import random
+import re
+import time
+
+from services.reviews import analyze_many, analyze_sentiment
+
+
+# === Original Implementation (baseline) ===
+def legacy_analyze_sentiment(review):
+    if not review or not review.strip():
+        return {"sentiment": "neutral", "star_rating": 3}
+
+    review_lower = review.lower().strip()
+
+    positive_patterns = [
+        r'\b(excellent|amazing|great|wonderful|fantastic|delicious|love|perfect|best|awesome|outstanding|superb|tasty|yummy|satisfied|happy|pleased|recommend|highly|very good|really good)\b',
+        r'\b(5|five)\s*(star|stars)\b',
+        r'\b(10/10|9/10|8/10)\b',
+    ]
+    negative_patterns = [
+        r'\b(terrible|awful|horrible|bad|worst|disgusting|hate|disappointed|poor|unacceptable|inedible|waste|regret|never again|avoid|disgusting|nasty|sick)\b',
+        r'\b(1|one)\s*(star|stars)\b',
+        r'\b(0/10|1/10|2/10)\b',
+    ]
+
+    positive_count = sum(len(re.findall(pattern, review_lower)) for pattern in positive_patterns)
+    negative_count = sum(len(re.findall(pattern, review_lower)) for pattern in negative_patterns)
+
+    if positive_count > negative_count:
+        sentiment = "positive"
+        if positive_count >= 3:
+            star_rating = 5
+        elif positive_count >= 2:
+            star_rating = 4
+        else:
+            star_rating = 4
+    elif negative_count > positive_count:
+        sentiment = "negative"
+        if negative_count >= 3:
+            star_rating = 1
+        elif negative_count >= 2:
+            star_rating = 2
+        else:
+            star_rating = 2
+    else:
+        sentiment = "neutral"
+        star_rating = 3
+
+    return {"sentiment": sentiment, "star_rating": star_rating}
+
+
+POSITIVE = ["Excellent", "amazing", "great", "delicious", "LOVE", "perfect", "best", "tasty", "very good",
+            "really  good", "highly", "recommend", "5 stars", "five star", "10/10", "9/10", "8/10"]
+NEGATIVE = ["terrible", "awful", "bad", "Worst", "disgusting", "hate", "poor", "never again", "avoid",
+            "nasty", "sick", "1 star", "one stars", "0/10", "1/10", "2/10"]
+NEAR_MISS = ["badge", "greatness", "12/10", "15 stars", "bestow", "lovely", "sickly", "avoidance", "goodness"]
+FILLER = ["the", "pizza", "was", "served", "warm", "and", "staff", "were", "quick", "we", "ordered", "again",
+          "portion", "price", "table", "evening", "sauce", "crust", "with", "friends", "."]
+
+
+def synthetic_reviews(count: int, seed: int):
+    rng = random.Random(seed)
+    pool = POSITIVE + NEGATIVE + NEAR_MISS
+    reviews = []
+    for _ in range(count):
+        words = [rng.choice(FILLER) for _ in range(rng.randint(8, 40))]
+        for _ in range(rng.randint(0, 4)):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(pool))
+        reviews.append(" ".join(words))
+    reviews += ["", "   ", "5stars!", "one-star", "Very Good", "never  again"]
+    return reviews
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main(args):
+    reviews = synthetic_reviews(args.reviews, args.seed)
+
+    mismatches = [
+        r for r in reviews if legacy_analyze_sentiment(r) != analyze_sentiment(r)
+    ]
+    print(f"agreement: {len(reviews) - len(mismatches)}/{len(reviews)}")
+    for r in mismatches[:5]:
+        print(f"  mismatch: {r!r}: {legacy_analyze_sentiment(r)} vs {analyze_sentiment(r)}")
+
+    legacy = timed(lambda: [legacy_analyze_sentiment(r) for r in reviews])
+    single = timed(lambda: [analyze_sentiment(r) for r in reviews])
+    batch = timed(lambda: analyze_many(reviews))
+    per = 1e6 / len(reviews)
+    print(f"legacy analyze_sentiment   {legacy:7.3f}s  {legacy * per:6.2f}us/review")
+    print(f"engine analyze_sentiment   {single:7.3f}s  {single * per:6.2f}us/review  ({legacy / single:.1f}x)")
+    print(f"engine analyze_many        {batch:7.3f}s  {batch * per:6.2f}us/review  ({legacy / batch:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reviews", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
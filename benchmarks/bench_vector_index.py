@@ -0,0 +1,106 @@
+"""
+Recall / latency / memory of compressed FAISS index variants against the flat index.
+
+Uses clustered synthetic 384-d vectors (the all-MiniLM-L6-v2 dimension) by
+default, or the vectors of the active chatbot index with --from-index.
+For every variant built by services.vector_index.build_faiss_index and every
+nprobe value it reports recall@8 against exact (flat) search, single-query
+latency p50/p99, serialized index size and the process RSS growth while
+building it.
+
+Usage:
+    python -m benchmarks.bench_vector_index [--count 100000] [--queries 500]
+    python -m benchmarks.bench_vector_index --from-index
+"""
+import argparse
+import os
+import time
+
+import faiss
+import numpy as np
+
+from services.vector_index import VECTOR_DB_DIR, build_faiss_index, resolve_index_dir
+
+K = 8
+
+
+def rss_mib() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return float("nan")
+
+
+def synthetic_vectors(count: int, dim: int, clusters: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=count)
+    vectors = centers[labels] + 0.35 * rng.normal(size=(count, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def search_all(index, queries: np.ndarray):
+    latencies = []
+    results = np.empty((len(queries), K), dtype=np.int64)
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        _, ids = index.search(query[None, :], K)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results[i] = ids[0]
+    return results, np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+def recall(results: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(r) & set(t)) for r, t in zip(results, truth))
+    return hits / truth.size
+
+
+def main(args):
+    if args.from_index:
+        index = faiss.read_index(os.path.join(resolve_index_dir(VECTOR_DB_DIR), "index.faiss"))
+        vectors = index.reconstruct_n(0, index.ntotal)
+    else:
+        vectors = synthetic_vectors(args.count, args.dim, args.clusters)
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.choice(len(vectors), size=min(args.queries, len(vectors)), replace=False)]
+    queries = queries + 0.05 * rng.normal(size=queries.shape).astype(np.float32)
+
+    print(f"{len(vectors)} vectors x {vectors.shape[1]} dims, {len(queries)} queries, recall@{K} vs flat")
+    truth = None
+    for index_type in ["flat"] + args.types:
+        before = rss_mib()
+        start = time.perf_counter()
+        index = build_faiss_index(index_type, vectors, nlist=args.nlist, pq_m=args.pq_m)
+        build_s = time.perf_counter() - start
+        rss_delta = rss_mib() - before
+        size_mib = faiss.serialize_index(index).nbytes / 2**20
+
+        probes = args.nprobe if index_type.startswith("ivf") else [None]
+        for nprobe in probes:
+            if nprobe is not None:
+                faiss.extract_index_ivf(index).nprobe = nprobe
+            results, p50, p99 = search_all(index, queries)
+            if truth is None:
+                truth = results
+            label = index_type if nprobe is None else f"{index_type} nprobe={nprobe}"
+            print(
+                f"  {label:<20} recall@{K}={recall(results, truth):.3f}  p50={p50:7.3f}ms  p99={p99:7.3f}ms  "
+                f"size={size_mib:8.1f}MiB  rss+={rss_delta:7.1f}MiB  build={build_s:6.1f}s"
+            )
+        del index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--types", nargs="+", default=["ivf", "ivfsq", "ivfpq", "sq8"])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--nlist", type=int, default=None)
+    parser.add_argument("--pq-m", type=int, default=48)
+    parser.add_argument("--from-index", action="store_true", help="use the active chatbot index vectors")
+    main(parser.parse_args())
@@ -0,0 +1,107 @@
+import time
+from typing import Any, Dict, Optional
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling a dependency while its circuit is open.
+    """
+
+
+# === Circuit Breaker ===
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed:    calls go through; `failure_threshold` consecutive failures trip it
+    open:      calls fail fast with CircuitOpenError for `reset_timeout` seconds
+    half_open: up to `half_open_max_calls` probe calls go through; a success
+               closes the circuit, a failure opens it again
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_timeout: float,
+        half_open_max_calls: int = 1,
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = max(1, half_open_max_calls)
+
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._half_open_at = 0.0
+        self._last_error: Optional[str] = None
+        self._trips = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self._state
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.OPEN:
+            return False
+
+        now = time.monotonic()
+        # A probe that never reported back (e.g. cancelled) frees its slot after reset_timeout
+        if self._state != self.HALF_OPEN or now - self._half_open_at >= self.reset_timeout:
+            if self._state != self.HALF_OPEN:
+                print(f"Circuit '{self.name}' half-open: probing")
+            self._state = self.HALF_OPEN
+            self._half_open_calls = 0
+            self._half_open_at = now
+        if self._half_open_calls >= self.half_open_max_calls:
+            return False
+        self._half_open_calls += 1
+        return True
+
+    def record_success(self):
+        if self._state != self.CLOSED:
+            print(f"Circuit '{self.name}' closed: dependency recovered")
+        self._state = self.CLOSED
+        self._failures = 0
+        self._half_open_calls = 0
+
+    def record_failure(self, error: Optional[BaseException] = None):
+        self._failures += 1
+        if error is not None:
+            self._last_error = f"{type(error).__name__}: {error}"
+
+        if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                self._trips += 1
+                print(f"Circuit '{self.name}' open after {self._failures} failure(s): {self._last_error}")
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+            self._half_open_calls = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        State for monitoring / health endpoints.
+        """
+        state = self.state
+        retry_in = None
+        if state == self.OPEN:
+            retry_in = round(max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at)), 3)
+        return {
+            "name": self.name,
+            "state": state,
+            "consecutive_failures": self._failures,
+            "trips": self._trips,
+            "retry_in_seconds": retry_in,
+            "last_error": self._last_error,
+        }
@@ -0,0 +1,117 @@
+import asyncio
+import math
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+# === L1 Cache Entry ===
+class CacheEntry:
+    """
+    A locally cached value.
+
+    `expires_at` bounds how long this worker serves the value from memory.
+    `source_expires_at` is when the shared (Redis) copy expires and `delta` is
+    how long the value took to recompute; together they drive probabilistic
+    early refresh (XFetch), so one process refreshes shortly before expiry
+    instead of every process reloading at once after it.
+    """
+
+    __slots__ = ("value", "expires_at", "source_expires_at", "delta")
+
+    def __init__(self, value: Any, expires_at: float, source_expires_at: float, delta: float):
+        self.value = value
+        self.expires_at = expires_at
+        self.source_expires_at = source_expires_at
+        self.delta = delta
+
+    def should_refresh(self, beta: float, now: Optional[float] = None) -> bool:
+        if beta <= 0 or self.delta <= 0:
+            return False
+        now = time.monotonic() if now is None else now
+        # -log(U) with U in (0, 1] is exponentially distributed: refresh gets
+        # more likely as expiry approaches and for slower recomputations
+        return now - self.delta * beta * math.log(1.0 - random.random()) >= self.source_expires_at
+
+
+# === In-Process LRU Cache with TTL ===
+class LRUCache:
+    def __init__(self, max_items: int, ttl: float):
+        self.max_items = max_items
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        source_ttl: Optional[float] = None,
+        delta: float = 0.0,
+    ) -> CacheEntry:
+        """
+        Store a value for at most `ttl` seconds, never past `source_ttl`
+        (the remaining lifetime of the shared copy) when it is known.
+        """
+        if self.max_items <= 0 or self.ttl <= 0:
+            return CacheEntry(value, 0.0, 0.0, delta)
+
+        now = time.monotonic()
+        ttl = self.ttl if source_ttl is None else min(self.ttl, source_ttl)
+        source_expires_at = now + (self.ttl if source_ttl is None else source_ttl)
+        entry = CacheEntry(value, now + ttl, source_expires_at, delta)
+
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_items:
+            self._entries.popitem(last=False)
+        return entry
+
+    def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+
+# === Single-Flight Request Coalescing ===
+class SingleFlight:
+    """
+    Runs at most one load per key at a time; concurrent callers for the same
+    key await the in-flight load instead of starting their own.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, "asyncio.Task[Any]"] = {}
+
+    def spawn(self, key: str, fn: Callable[[], Awaitable[Any]]) -> "asyncio.Task[Any]":
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+
+            def _done(finished: "asyncio.Task[Any]"):
+                if self._inflight.get(key) is finished:
+                    del self._inflight[key]
+                if not finished.cancelled() and finished.exception() is not None:
+                    print(f"Cache load error for {key}: {finished.exception()}")
+
+            task.add_done_callback(_done)
+        return task
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        # Shield so a cancelled caller does not cancel the load for the others
+        return await asyncio.shield(self.spawn(key, fn))
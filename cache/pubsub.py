@@ -0,0 +1,91 @@
+import asyncio
+from typing import AsyncIterator, Dict, List
+
+from cache.redis_cache import get_redis, redis_guard, _report_error
+
+
+# === In-Process Broker (single worker / tests) ===
+class InProcessBroker:
+    """
+    Channel broker inside one process: every listener of a channel receives
+    every message published to it after it started listening.
+    """
+
+    def __init__(self, queue_size: int = 1000):
+        self.queue_size = queue_size
+        self._listeners: Dict[str, List["asyncio.Queue[bytes]"]] = {}
+
+    async def publish(self, channel: str, message: bytes) -> int:
+        listeners = self._listeners.get(channel, [])
+        for queue in listeners:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(message)
+        return len(listeners)
+
+    async def listen(self, channel: str) -> AsyncIterator[bytes]:
+        queue: "asyncio.Queue[bytes]" = asyncio.Queue(self.queue_size)
+        self._listeners.setdefault(channel, []).append(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._listeners[channel].remove(queue)
+
+
+# === Redis Pub/Sub Broker (shared across workers) ===
+class RedisBroker:
+    """
+    Redis pub/sub. A listener holds one pooled connection for its subscription
+    and resubscribes with backoff after connection errors; messages published
+    while disconnected are lost (pub/sub has no replay).
+
+    The listener retries on its own backoff and never reports to the shared
+    Redis circuit breaker: a long-lived retry loop would keep re-opening it
+    and starve every cache call. Publishing goes through redis_guard as usual.
+    """
+
+    def __init__(self, poll_timeout: float = 1.0, max_backoff: float = 5.0):
+        self.poll_timeout = poll_timeout
+        self.max_backoff = max_backoff
+
+    async def publish(self, channel: str, message: bytes) -> int:
+        async with redis_guard() as r:
+            return await r.publish(channel, message)
+
+    async def listen(self, channel: str) -> AsyncIterator[bytes]:
+        backoff = 0.1
+        while True:
+            pubsub = None
+            try:
+                pubsub = (await get_redis()).pubsub()
+                await pubsub.subscribe(channel)
+                backoff = 0.1
+                while True:
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True,
+                        timeout=self.poll_timeout,
+                    )
+                    if message is not None and message.get("type") == "message":
+                        yield message["data"]
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                _report_error("Redis subscribe error", e)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+
+
+def broker_from_setting(name: str, queue_size: int = 1000):
+    """
+    "memory" for the in-process broker, anything else for Redis pub/sub.
+    """
+    if name.strip().lower() == "memory":
+        return InProcessBroker(queue_size)
+    return RedisBroker()
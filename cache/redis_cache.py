@@ -1,82 +1,355 @@
-from typing import List, Dict, Any, Optional
-import json
+from typing import List, Dict, Any, Optional, Callable, Awaitable, Tuple
+from contextlib import asynccontextmanager
+import hashlib
+import time
 import redis.asyncio as redis
+from cache.circuit_breaker import CircuitBreaker, CircuitOpenError
+from cache.local_cache import LRUCache, SingleFlight
+from cache.serializers import serializer_from_setting
 from core.config import settings
 
+MenuLoader = Callable[[int], Awaitable[List[Dict[str, Any]]]]
+
 redis_client = None
 
+# === Cache Payload Serializer (tagged binary, still reads legacy JSON payloads) ===
+serializer = serializer_from_setting(settings.CACHE_SERIALIZER)
+
 async def get_redis():
     global redis_client
     if redis_client is None:
-        redis_client = redis.Redis(
+        pool = redis.BlockingConnectionPool(
             host=settings.REDIS_HOST,
             port=settings.REDIS_PORT,
             db=0,
-            decode_responses=True
+            decode_responses=False,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+            socket_keepalive=True,
+            health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
         )
+        redis_client = redis.Redis(connection_pool=pool)
     return redis_client
 
+# === Circuit Breaker around Redis ===
+# While open, cache calls fail fast and callers use the in-process fallback
+# instead of waiting for a connection timeout on every request.
+redis_breaker = CircuitBreaker(
+    "redis",
+    failure_threshold=settings.REDIS_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=settings.REDIS_BREAKER_RESET_TIMEOUT,
+)
+
+@asynccontextmanager
+async def redis_guard():
+    """
+    Yield the Redis client if the circuit allows it and record the outcome.
+    Raises CircuitOpenError without touching the network while open.
+    """
+    if not redis_breaker.allow():
+        raise CircuitOpenError("redis circuit open")
+    try:
+        yield await get_redis()
+    except Exception as e:
+        redis_breaker.record_failure(e)
+        raise
+    redis_breaker.record_success()
+
+def _report_error(message: str, error: Exception):
+    # Open-circuit fast failures are expected and already reported on trip
+    if not isinstance(error, CircuitOpenError):
+        print(f"{message}: {error}")
+
+def get_cache_status() -> Dict[str, Any]:
+    """
+    Cache health for monitoring: Redis circuit state and L1 occupancy.
+    """
+    return {
+        "redis": redis_breaker.snapshot(),
+        "l1_items": len(_menu_l1),
+    }
+
+# === L1 (in-process) Cache in front of Redis for menu:{branch} ===
+_menu_l1 = LRUCache(settings.CACHE_L1_MAX_ITEMS, settings.CACHE_L1_TTL)
+_menu_flight = SingleFlight()
+# Last observed recompute time per key, used for early refresh of entries read from Redis
+_menu_load_seconds: Dict[str, float] = {}
+_DEFAULT_LOAD_SECONDS = 0.05
+
+def _menu_key(branch: int) -> str:
+    return f"menu:{branch}"
+
+def _remember_menu(key: str, data: Optional[bytes], ttl_ms: Optional[int]) -> Optional[List[Dict[str, Any]]]:
+    """
+    Decode a Redis reply and keep it in L1 for at most its remaining Redis TTL.
+    """
+    if not data:
+        return None
+    menu = serializer.loads(data)
+    _menu_l1.set(
+        key,
+        menu,
+        source_ttl=ttl_ms / 1000 if ttl_ms and ttl_ms > 0 else None,
+        delta=_menu_load_seconds.get(key, _DEFAULT_LOAD_SECONDS),
+    )
+    return menu
+
 async def get_menu_from_cache(branch: int) -> Optional[List[Dict[str, Any]]]:
+    key = _menu_key(branch)
+    entry = _menu_l1.get(key)
+    if entry is not None:
+        return entry.value
+
     try:
-        r = await get_redis()
-        data = await r.get(f"menu:{branch}")
-        if data:
-            return json.loads(data)
+        async with redis_guard() as r:
+            async with r.pipeline(transaction=False) as pipe:
+                pipe.get(key)
+                pipe.pttl(key)
+                data, ttl_ms = await pipe.execute()
+        return _remember_menu(key, data, ttl_ms)
     except Exception as e:
-        print(f"Redis get error: {e}")
+        _report_error("Redis get error", e)
     return None
 
-async def store_menu_in_cache(branch: int, menu: List[Dict[str, Any]]):
+async def store_menu_in_cache(branch: int, menu: List[Dict[str, Any]], delta: float = 0.0):
+    key = _menu_key(branch)
+    _menu_l1.set(
+        key,
+        menu,
+        source_ttl=settings.REDIS_TTL,
+        delta=delta or _menu_load_seconds.get(key, _DEFAULT_LOAD_SECONDS),
+    )
+    try:
+        payload = serializer.dumps(menu)
+        async with redis_guard() as r:
+            await r.setex(
+                key,
+                settings.REDIS_TTL,
+                payload
+            )
+    except Exception as e:
+        _report_error("Redis store error", e)
+
+async def delete_menu_from_cache(branch: int):
+    _menu_l1.delete(_menu_key(branch))
+    try:
+        async with redis_guard() as r:
+            await r.delete(_menu_key(branch))
+    except Exception as e:
+        _report_error("Redis delete error", e)
+
+# === Batched Multi-Branch Access (admin and warm-up paths) ===
+async def get_menus_from_cache(branches: List[int]) -> Dict[int, Optional[List[Dict[str, Any]]]]:
+    """
+    Get several branch menus at once: L1 hits are served locally and all
+    remaining keys are fetched in a single pipelined round trip.
+    Branches missing from both tiers map to None.
+    """
+    menus: Dict[int, Optional[List[Dict[str, Any]]]] = {}
+    missing: List[int] = []
+    for branch in branches:
+        entry = _menu_l1.get(_menu_key(branch))
+        if entry is not None:
+            menus[branch] = entry.value
+        else:
+            menus[branch] = None
+            missing.append(branch)
+
+    if not missing:
+        return menus
+
     try:
-        r = await get_redis()
-        await r.setex(
-            f"menu:{branch}", 
-            settings.REDIS_TTL, 
-            json.dumps(menu, default=str)
+        async with redis_guard() as r:
+            async with r.pipeline(transaction=False) as pipe:
+                for branch in missing:
+                    pipe.get(_menu_key(branch))
+                    pipe.pttl(_menu_key(branch))
+                replies = await pipe.execute()
+        for i, branch in enumerate(missing):
+            menus[branch] = _remember_menu(_menu_key(branch), replies[2 * i], replies[2 * i + 1])
+    except Exception as e:
+        _report_error("Redis batch get error", e)
+    return menus
+
+async def store_menus_in_cache(menus: Dict[int, List[Dict[str, Any]]]):
+    """
+    Store several branch menus in one pipelined round trip.
+    """
+    if not menus:
+        return
+    for branch, menu in menus.items():
+        key = _menu_key(branch)
+        _menu_l1.set(
+            key,
+            menu,
+            source_ttl=settings.REDIS_TTL,
+            delta=_menu_load_seconds.get(key, _DEFAULT_LOAD_SECONDS),
         )
+    try:
+        payloads = {_menu_key(branch): serializer.dumps(menu) for branch, menu in menus.items()}
+        async with redis_guard() as r:
+            async with r.pipeline(transaction=False) as pipe:
+                for key, payload in payloads.items():
+                    pipe.setex(key, settings.REDIS_TTL, payload)
+                await pipe.execute()
+    except Exception as e:
+        _report_error("Redis batch store error", e)
+
+async def _reload_menu(branch: int, loader: MenuLoader) -> List[Dict[str, Any]]:
+    started = time.monotonic()
+    menu = await loader(branch)
+    delta = time.monotonic() - started
+    # Unknown branches load as []: caching those would let made-up ids evict real menus
+    if menu:
+        _menu_load_seconds[_menu_key(branch)] = delta
+        await store_menu_in_cache(branch, menu, delta=delta)
+    return menu
+
+async def _load_menu(branch: int, loader: MenuLoader) -> List[Dict[str, Any]]:
+    menu = await get_menu_from_cache(branch)
+    if menu:
+        return menu
+    return await _reload_menu(branch, loader)
+
+async def get_or_load_menu(branch: int, loader: MenuLoader) -> List[Dict[str, Any]]:
+    """
+    Get a branch menu from L1, then Redis, then `loader`.
+    Concurrent misses for the same branch share one load, and entries close to
+    expiry are refreshed early in the background by a single caller.
+    """
+    key = _menu_key(branch)
+    entry = _menu_l1.get(key)
+    if entry is not None:
+        if entry.should_refresh(settings.CACHE_EARLY_REFRESH_BETA):
+            _menu_flight.spawn(key, lambda: _reload_menu(branch, loader))
+        return entry.value
+
+    return await _menu_flight.do(key, lambda: _load_menu(branch, loader))
+
+# === Recommendation Result Cache (reco:{branch}:{menu_hash}:{prefs_hash}) ===
+# The menu hash is part of the key, so a changed menu never serves old deals;
+# entries for the previous menu simply expire after RECO_CACHE_TTL.
+_reco_flight = SingleFlight()
+
+def recommendation_key(branch: int, menu_hash: str, prefs_hash: str) -> str:
+    return f"reco:{branch}:{menu_hash}:{prefs_hash}"
+
+async def get_recommendation_from_cache(key: str) -> Optional[List[Dict[str, Any]]]:
+    try:
+        async with redis_guard() as r:
+            data = await r.get(key)
+        if data:
+            return serializer.loads(data)
+    except Exception as e:
+        _report_error("Redis recommendation get error", e)
+    return None
+
+async def store_recommendation_in_cache(key: str, deals: List[Dict[str, Any]]):
+    try:
+        payload = serializer.dumps(deals)
+        async with redis_guard() as r:
+            await r.setex(key, settings.RECO_CACHE_TTL, payload)
     except Exception as e:
-        print(f"Redis store error: {e}")
+        _report_error("Redis recommendation store error", e)
+
+async def get_or_compute_recommendation(
+    key: str,
+    compute: Callable[[], Awaitable[List[Dict[str, Any]]]],
+) -> List[Dict[str, Any]]:
+    """
+    Return cached deals for `key` or compute them once (concurrent identical
+    requests share one computation). Empty results are not cached.
+    """
+    if settings.RECO_CACHE_TTL <= 0:
+        return await compute()
+
+    async def load():
+        deals = await get_recommendation_from_cache(key)
+        if deals is not None:
+            return deals
+        deals = await compute()
+        if deals:
+            await store_recommendation_in_cache(key, deals)
+        return deals
+
+    return await _reco_flight.do(key, load)
 
 # === In-Memory Cache for Reviews Menu (Redis-style logic) ===
 _reviews_menu_cache: Optional[List[Dict[str, Any]]] = None
 _cache_key = "reviews_menu"
+# Content hash of the cached reviews menu, written with it in one transaction
+_reviews_menu_etag: Optional[str] = None
+_etag_key = "reviews_menu:etag"
+
+def content_hash(payload: bytes) -> str:
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
 
 async def get_reviews_menu_from_cache() -> Optional[List[Dict[str, Any]]]:
     """
     Get menu with reviews from cache.
-    Uses in-memory cache (Redis-style logic).
+    The in-memory copy is used only while Redis is failing; a Redis miss
+    returns None so the caller reloads (other workers may have added reviews).
     """
-    global _reviews_menu_cache
     try:
         # Try Redis first if available
-        r = await get_redis()
-        data = await r.get(_cache_key)
-        if data:
-            return json.loads(data)
+        async with redis_guard() as r:
+            data = await r.get(_cache_key)
+        return serializer.loads(data) if data else None
     except Exception:
-        # Fallback to in-memory cache
-        pass
-    
-    # Return in-memory cache if Redis fails
-    return _reviews_menu_cache
+        # Fallback to in-memory cache if Redis fails
+        return _reviews_menu_cache
+
+async def get_reviews_menu_and_etag_from_cache() -> Tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
+    """
+    Reviews menu and its content hash, read together so they always describe
+    the same version. (None, None) on a Redis miss; the in-memory copy only
+    while Redis is failing.
+    """
+    try:
+        async with redis_guard() as r:
+            data, etag = await r.mget(_cache_key, _etag_key)
+        if not data:
+            return None, None
+        # Entries stored before the hash key existed are hashed here
+        return serializer.loads(data), etag.decode() if etag else content_hash(data)
+    except Exception:
+        return _reviews_menu_cache, _reviews_menu_etag
 
-async def store_reviews_menu_in_cache(menu: List[Dict[str, Any]]):
+async def get_reviews_menu_etag() -> Optional[str]:
+    """
+    Content hash of the cached reviews menu without loading the menu
+    (None if nothing is cached; the in-memory copy's only while Redis is failing).
+    """
+    try:
+        async with redis_guard() as r:
+            data = await r.get(_etag_key)
+        return data.decode() if data else None
+    except Exception:
+        return _reviews_menu_etag
+
+async def store_reviews_menu_in_cache(menu: List[Dict[str, Any]]) -> str:
     """
     Store menu with reviews in cache.
     Uses in-memory cache (Redis-style logic).
+    Returns the content hash stored with it.
     """
-    global _reviews_menu_cache
+    global _reviews_menu_cache, _reviews_menu_etag
+    payload = serializer.dumps(menu)
+    etag = content_hash(payload)
     try:
         # Try Redis first if available
-        r = await get_redis()
-        await r.setex(
-            _cache_key,
-            settings.REDIS_TTL,
-            json.dumps(menu, default=str)
-        )
+        async with redis_guard() as r:
+            async with r.pipeline(transaction=True) as pipe:
+                pipe.setex(_cache_key, settings.REDIS_TTL, payload)
+                pipe.setex(_etag_key, settings.REDIS_TTL, etag)
+                await pipe.execute()
     except Exception:
         # Fallback to in-memory cache
         pass
     
     # Store in in-memory cache as fallback
     _reviews_menu_cache = menu
+    _reviews_menu_etag = etag
+    return etag
@@ -0,0 +1,219 @@
+import json
+import struct
+import sys
+from array import array
+from typing import Any, Dict, List, Optional
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+# === Payload Header ===
+# b"\xc1" can never start a UTF-8 / JSON document, so tagged payloads and
+# legacy json.dumps payloads written before this format can be told apart.
+MAGIC = b"\xc1"
+SCHEMA_VERSION = 1
+_HEADER = struct.Struct("<cBB")  # magic, schema version, codec id
+_COUNT = struct.Struct("<I")
+
+# Column layout shared with db/menu_store.py
+MENU_INT_COLUMNS = ("id", "branch", "price", "serves")
+MENU_STR_COLUMNS = ("name", "category", "portion")
+MENU_KEYS = frozenset(MENU_INT_COLUMNS + MENU_STR_COLUMNS)
+
+
+class CodecError(ValueError):
+    pass
+
+
+# === Codecs ===
+class JsonCodec:
+    """
+    Generic fallback: compact UTF-8 JSON.
+    """
+    codec_id = 1
+    name = "json"
+
+    def can_encode(self, value: Any) -> bool:
+        return True
+
+    def encode(self, value: Any) -> bytes:
+        return json.dumps(value, default=str, separators=(",", ":")).encode("utf-8")
+
+    def decode(self, payload: bytes) -> Any:
+        return json.loads(bytes(payload))
+
+
+class MsgpackCodec:
+    """
+    Generic binary codec, available when the optional `msgpack` package is installed.
+    """
+    codec_id = 2
+    name = "msgpack"
+
+    def can_encode(self, value: Any) -> bool:
+        return msgpack is not None
+
+    def encode(self, value: Any) -> bytes:
+        return msgpack.packb(value, default=str, use_bin_type=True)
+
+    def decode(self, payload: bytes) -> Any:
+        if msgpack is None:
+            raise CodecError("msgpack payload but msgpack is not installed")
+        return msgpack.unpackb(payload, raw=False)
+
+
+class ColumnarMenuCodec:
+    """
+    Struct-packed columnar layout for menu lists (rows of
+    id, branch, name, category, portion, price, serves):
+
+        row count (uint32)
+        int32 little-endian array per int column
+        per string column: byte length (uint32) + NUL-joined UTF-8 values
+    """
+    codec_id = 3
+    name = "columnar"
+
+    def can_encode(self, value: Any) -> bool:
+        if not isinstance(value, list):
+            return False
+        for row in value:
+            if not isinstance(row, dict) or row.keys() != MENU_KEYS:
+                return False
+            for col in MENU_INT_COLUMNS:
+                if type(row[col]) is not int or not -2**31 <= row[col] < 2**31:
+                    return False
+            for col in MENU_STR_COLUMNS:
+                if not isinstance(row[col], str) or "\x00" in row[col]:
+                    return False
+        return True
+
+    def encode(self, value: List[Dict[str, Any]]) -> bytes:
+        parts = [_COUNT.pack(len(value))]
+        for col in MENU_INT_COLUMNS:
+            values = array("i", (row[col] for row in value))
+            if sys.byteorder == "big":
+                values.byteswap()
+            parts.append(values.tobytes())
+        for col in MENU_STR_COLUMNS:
+            joined = "\x00".join(row[col] for row in value).encode("utf-8")
+            parts.append(_COUNT.pack(len(joined)))
+            parts.append(joined)
+        return b"".join(parts)
+
+    def decode(self, payload: bytes) -> List[Dict[str, Any]]:
+        view = memoryview(payload)
+        (count,) = _COUNT.unpack_from(view, 0)
+        offset = _COUNT.size
+        columns: Dict[str, List[Any]] = {}
+
+        for col in MENU_INT_COLUMNS:
+            values = array("i")
+            size = count * values.itemsize
+            values.frombytes(view[offset:offset + size])
+            if sys.byteorder == "big":
+                values.byteswap()
+            columns[col] = values.tolist()
+            offset += size
+
+        for col in MENU_STR_COLUMNS:
+            (size,) = _COUNT.unpack_from(view, offset)
+            offset += _COUNT.size
+            text = bytes(view[offset:offset + size]).decode("utf-8")
+            columns[col] = text.split("\x00") if count else []
+            offset += size
+
+        if offset != len(payload) or any(len(v) != count for v in columns.values()):
+            raise CodecError("corrupt columnar menu payload")
+
+        return [
+            {
+                "id": row_id,
+                "branch": branch,
+                "name": name,
+                "category": category,
+                "portion": portion,
+                "price": price,
+                "serves": serves,
+            }
+            for row_id, branch, price, serves, name, category, portion in zip(
+                columns["id"], columns["branch"], columns["price"], columns["serves"],
+                columns["name"], columns["category"], columns["portion"],
+            )
+        ]
+
+
+_CODECS = {codec.codec_id: codec for codec in (JsonCodec(), MsgpackCodec(), ColumnarMenuCodec())}
+_CODECS_BY_NAME = {codec.name: codec for codec in _CODECS.values()}
+
+
+def register_codec(codec):
+    """
+    Register an additional codec (needs codec_id, name, can_encode, encode, decode).
+    """
+    _CODECS[codec.codec_id] = codec
+    _CODECS_BY_NAME[codec.name] = codec
+
+
+# === Serializer ===
+class CacheSerializer:
+    """
+    Encodes cache values with the first preferred codec that accepts them and
+    tags the payload with (magic, schema version, codec id).
+
+    `preferred` lists codec names in order of preference; the special name
+    "legacy-json" writes untagged json.dumps payloads, for rolling back or for
+    rolling out while older workers that only read JSON are still running.
+    Decoding always accepts both tagged and legacy payloads.
+    """
+
+    def __init__(self, preferred: List[str]):
+        self.preferred = preferred
+
+    def dumps(self, value: Any) -> bytes:
+        for name in self.preferred:
+            if name == "legacy-json":
+                return json.dumps(value, default=str).encode("utf-8")
+            codec = _CODECS_BY_NAME.get(name)
+            if codec is not None and codec.can_encode(value):
+                return _HEADER.pack(MAGIC, SCHEMA_VERSION, codec.codec_id) + codec.encode(value)
+        codec = _CODECS_BY_NAME["json"]
+        return _HEADER.pack(MAGIC, SCHEMA_VERSION, codec.codec_id) + codec.encode(value)
+
+    def loads(self, data: Optional[bytes]) -> Any:
+        if data is None:
+            return None
+        if isinstance(data, str):
+            return json.loads(data)
+        if not data.startswith(MAGIC):
+            # Payload written by json.dumps before the serializer existed
+            return json.loads(data)
+
+        _, version, codec_id = _HEADER.unpack_from(data, 0)
+        if version != SCHEMA_VERSION:
+            raise CodecError(f"unsupported cache schema version {version}")
+        codec = _CODECS.get(codec_id)
+        if codec is None:
+            raise CodecError(f"unknown cache codec id {codec_id}")
+        return codec.decode(memoryview(data)[_HEADER.size:])
+
+
+def payload_codec(data: bytes) -> str:
+    """
+    Name of the codec a cached payload was written with ("legacy-json" if untagged).
+    """
+    if not data.startswith(MAGIC):
+        return "legacy-json"
+    _, _, codec_id = _HEADER.unpack_from(data, 0)
+    codec = _CODECS.get(codec_id)
+    return codec.name if codec is not None else f"unknown:{codec_id}"
+
+
+def serializer_from_setting(setting: str) -> CacheSerializer:
+    """
+    Build a serializer from a comma-separated preference list, e.g.
+    "columnar,msgpack,json" (default) or "legacy-json".
+    """
+    return CacheSerializer([name.strip() for name in setting.split(",") if name.strip()])
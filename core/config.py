@@ -16,6 +16,52 @@ class Settings:
     REDIS_HOST: str | None = os.getenv("REDIS_HOST")
     REDIS_PORT: int = int(os.getenv("REDIS_PORT", 6379))
     REDIS_TTL: int = int(os.getenv("REDIS_TTL", 300))
+    REDIS_MAX_CONNECTIONS: int = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+    # Seconds to wait for a free pooled connection before giving up
+    REDIS_POOL_TIMEOUT: float = float(os.getenv("REDIS_POOL_TIMEOUT", 1.0))
+    REDIS_SOCKET_TIMEOUT: float = float(os.getenv("REDIS_SOCKET_TIMEOUT", 0.5))
+    REDIS_CONNECT_TIMEOUT: float = float(os.getenv("REDIS_CONNECT_TIMEOUT", 0.5))
+    REDIS_HEALTH_CHECK_INTERVAL: int = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", 30))
+    # Consecutive failures before the Redis circuit opens, and seconds before a half-open probe
+    REDIS_BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("REDIS_BREAKER_FAILURE_THRESHOLD", 3))
+    REDIS_BREAKER_RESET_TIMEOUT: float = float(os.getenv("REDIS_BREAKER_RESET_TIMEOUT", 10))
+    # Codec preference for cached payloads; "legacy-json" writes the old format
+    CACHE_SERIALIZER: str = os.getenv("CACHE_SERIALIZER", "columnar,msgpack,json")
+
+    # === In-Process (L1) Cache ===
+    CACHE_L1_MAX_ITEMS: int = int(os.getenv("CACHE_L1_MAX_ITEMS", 256))
+    CACHE_L1_TTL: float = float(os.getenv("CACHE_L1_TTL", 30))
+    # XFetch beta: > 1 refreshes earlier, 0 disables early refresh
+    CACHE_EARLY_REFRESH_BETA: float = float(os.getenv("CACHE_EARLY_REFRESH_BETA", 1.0))
+    # Seconds a generated recommendation is reused for identical preferences (0 disables)
+    RECO_CACHE_TTL: int = int(os.getenv("RECO_CACHE_TTL", 900))
+
+    # === Data Files ===
+    # Seconds between menu.csv / orders.csv change checks (0 disables hot reload)
+    DATA_WATCH_INTERVAL: float = float(os.getenv("DATA_WATCH_INTERVAL", 2.0))
+    # Threads used to parse data files off the event loop
+    DB_IO_WORKERS: int = int(os.getenv("DB_IO_WORKERS", 4))
+
+    # === Reviews WebSocket Streaming ===
+    # Reviews per frame by default (1 keeps one message per review), client maximum,
+    # and the encoded size at which a frame is flushed early
+    REVIEWS_WS_BATCH_SIZE: int = int(os.getenv("REVIEWS_WS_BATCH_SIZE", 1))
+    REVIEWS_WS_MAX_BATCH_SIZE: int = int(os.getenv("REVIEWS_WS_MAX_BATCH_SIZE", 500))
+    REVIEWS_WS_BATCH_BYTES: int = int(os.getenv("REVIEWS_WS_BATCH_BYTES", 64 * 1024))
+    # Seconds a frame may wait on a slow client before the stream is closed
+    REVIEWS_WS_SEND_TIMEOUT: float = float(os.getenv("REVIEWS_WS_SEND_TIMEOUT", 10))
+
+    # === Live Review Events ===
+    # "redis" (pub/sub, shared by all workers) or "memory" (single process / tests)
+    REVIEWS_BROKER: str = os.getenv("REVIEWS_BROKER", "redis")
+    REVIEWS_CHANNEL: str = os.getenv("REVIEWS_CHANNEL", "reviews:events")
+    # Events a live websocket may fall behind before it is disconnected
+    REVIEWS_LIVE_QUEUE_SIZE: int = int(os.getenv("REVIEWS_LIVE_QUEUE_SIZE", 256))
+
+    # === Reviews Menu Endpoint ===
+    # Largest page size for /reviews/menu, and encoded responses kept per worker (keyed by ETag)
+    REVIEWS_MENU_MAX_LIMIT: int = int(os.getenv("REVIEWS_MENU_MAX_LIMIT", 100))
+    REVIEWS_MENU_RESPONSE_CACHE_ITEMS: int = int(os.getenv("REVIEWS_MENU_RESPONSE_CACHE_ITEMS", 128))
 
     # === FastAPI ===
     HOST: str = os.getenv("HOST", "0.0.0.0")
@@ -26,6 +72,38 @@ class Settings:
 
     # === Groq ===
     GROQ_API_KEY: str | None = os.getenv("GROQ_API_KEY")
+    # Per-request timeout (s), connect timeout (s) and SDK retries for LLM calls
+    GROQ_TIMEOUT: float = float(os.getenv("GROQ_TIMEOUT", 30))
+    GROQ_CONNECT_TIMEOUT: float = float(os.getenv("GROQ_CONNECT_TIMEOUT", 5))
+    GROQ_MAX_RETRIES: int = int(os.getenv("GROQ_MAX_RETRIES", 2))
+    # Overall seconds /recommend waits for the LLM before using the local deal optimizer
+    RECO_LLM_TIMEOUT: float = float(os.getenv("RECO_LLM_TIMEOUT", 20))
+    # Pooled HTTP connections to the Groq API shared by all LLM clients
+    GROQ_MAX_CONNECTIONS: int = int(os.getenv("GROQ_MAX_CONNECTIONS", 100))
+    GROQ_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("GROQ_MAX_KEEPALIVE_CONNECTIONS", 20))
+    GROQ_KEEPALIVE_EXPIRY: float = float(os.getenv("GROQ_KEEPALIVE_EXPIRY", 60))
+
+    # === Chatbot ===
+    # Load the embedding model / FAISS index in the background at startup
+    # (otherwise they load on the first chat request)
+    CHATBOT_PRELOAD: bool = os.getenv("CHATBOT_PRELOAD", "true").lower() in ("1", "true", "yes")
+    # Semantic answer cache: minimum cosine similarity for a hit, TTL (s), max entries
+    CHAT_CACHE_THRESHOLD: float = float(os.getenv("CHAT_CACHE_THRESHOLD", 0.95))
+    CHAT_CACHE_TTL: float = float(os.getenv("CHAT_CACHE_TTL", 3600))
+    CHAT_CACHE_MAX_ITEMS: int = int(os.getenv("CHAT_CACHE_MAX_ITEMS", 1000))
+    # Query embedding LRU size, and micro-batching window / size for the encoder
+    EMBED_CACHE_MAX_ITEMS: int = int(os.getenv("EMBED_CACHE_MAX_ITEMS", 2048))
+    EMBED_BATCH_WINDOW_MS: float = float(os.getenv("EMBED_BATCH_WINDOW_MS", 5))
+    EMBED_MAX_BATCH: int = int(os.getenv("EMBED_MAX_BATCH", 32))
+    # Serving index variant (flat, ivf, ivfpq, ivfsq, sq8) and IVF lists probed per query
+    VECTOR_INDEX_TYPE: str = os.getenv("VECTOR_INDEX_TYPE", "flat")
+    VECTOR_INDEX_NPROBE: int = int(os.getenv("VECTOR_INDEX_NPROBE", 8))
+    # Prompt budget (estimated tokens) for retrieved context and for the conversation history
+    CHAT_CONTEXT_MAX_TOKENS: int = int(os.getenv("CHAT_CONTEXT_MAX_TOKENS", 1200))
+    CHAT_HISTORY_MAX_TOKENS: int = int(os.getenv("CHAT_HISTORY_MAX_TOKENS", 300))
+    # Most recent history messages kept, and per-message cap (estimated tokens)
+    CHAT_HISTORY_MAX_MESSAGES: int = int(os.getenv("CHAT_HISTORY_MAX_MESSAGES", 6))
+    CHAT_HISTORY_MESSAGE_MAX_TOKENS: int = int(os.getenv("CHAT_HISTORY_MESSAGE_MAX_TOKENS", 80))
 
 
 settings = Settings()
@@ -1,67 +1,37 @@
-import csv
 import os
 
+from db.executor import run_blocking
+from db.menu_store import MenuStore
+from db.order_store import OrderCountStore
+from db.review_store import ReviewStore
+
 # Path to data
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 MENU_CSV = os.path.join(BASE_DIR, "data", "menu.csv")
 ORDERS_CSV = os.path.join(BASE_DIR, "data", "orders.csv")
+# Reviews posted through the API (appended at runtime)
+REVIEWS_JSONL = os.path.join(BASE_DIR, "data", "reviews.jsonl")
+
+# === In-Memory Stores (loaded once, hot-reloaded by db.watcher) ===
+menu_store = MenuStore(MENU_CSV)
+order_store = OrderCountStore(ORDERS_CSV)
+review_store = ReviewStore(REVIEWS_JSONL)
 
 # === Fetch Menu Items ===
 async def fetch_menu(branch: int):
-    results = []
-    try:
-        with open(MENU_CSV, mode='r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # Filter by branch. CSV read values are strings, need conversion.
-                try:
-                    row_branch = int(row['branch'])
-                except ValueError:
-                    continue
+    # Cold store: parse the CSV in the I/O pool, never on the event loop
+    if not menu_store.loaded:
+        await run_blocking(menu_store.columns)
 
-                if row_branch == branch:
-                    # Convert types to match previous behavior
-                    # "SELECT id, branch, name, category, portion, price, serves"
-                    item = {
-                        "id": int(row['id']),
-                        "branch": int(row['branch']),
-                        "name": row['name'],
-                        "category": row['category'],
-                        "portion": row['portion'],
-                        "price": int(row['price']),
-                        "serves": int(row['serves'])
-                    }
-                    results.append(item)
-    except FileNotFoundError:
-        print(f"File not found: {MENU_CSV}")
-        return []
-    except Exception as e:
-        print(f"Error reading menu csv: {e}")
-        return []
-    return results
+    # Served from the columnar store: O(items in branch), no file I/O per call
+    return menu_store.fetch(branch)
 
 # === Fetch Recent Orders Count ===
 async def fetch_recent_orders(branch: int):
-    counts = {}
-    try:
-        with open(ORDERS_CSV, mode='r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                try:
-                    row_branch = int(row['branch'])
-                except ValueError:
-                    continue
+    if not order_store.loaded:
+        await run_blocking(order_store.counts)
 
-                if row_branch == branch:
-                    item_name = row['item_name']
-                    counts[item_name] = counts.get(item_name, 0) + 1
-    except FileNotFoundError:
-        print(f"File not found: {ORDERS_CSV}")
-        return {}
-    except Exception as e:
-        print(f"Error reading orders csv: {e}")
-        return {}
-    return counts
+    return order_store.fetch(branch)
 
 # === Fetch Menu Items with Reviews ===
 async def fetch_menu_with_reviews():
@@ -192,4 +162,17 @@ async def fetch_menu_with_reviews():
         }
     ]
     
+    # Merge in reviews posted through the API
+    posted = await run_blocking(review_store.reviews_by_item)
+    for item in menu_items:
+        item["reviews"] = item["reviews"] + posted.get(item["id"], [])
+    
     return menu_items
+
+# === Store a Posted Review ===
+async def add_review(item_id: int, review: dict, min_id: int = 0):
+    """
+    Durably store a review for a menu item; fetch_menu_with_reviews includes it
+    from then on. Assigns the review id (above `min_id`) and returns the stored review.
+    """
+    return await run_blocking(review_store.append, item_id, review, min_id)
@@ -0,0 +1,19 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable
+
+from core.config import settings
+
+# === Bounded Thread Pool for Blocking File I/O and CSV Parsing ===
+# Keeps parsing off the event loop without letting a burst of cold misses
+# spawn unbounded threads.
+io_executor = ThreadPoolExecutor(
+    max_workers=settings.DB_IO_WORKERS,
+    thread_name_prefix="db-io",
+)
+
+
+async def run_blocking(fn: Callable[..., Any], *args: Any) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(io_executor, partial(fn, *args))
@@ -0,0 +1,204 @@
+import csv
+import threading
+from array import array
+from typing import Dict, List, Optional, Set, Tuple, Any
+
+# Column layout of data/menu.csv ("SELECT id, branch, name, category, portion, price, serves")
+COLUMNS = ("id", "branch", "name", "category", "portion", "price", "serves")
+INT_COLUMNS = ("id", "branch", "price", "serves")
+STR_COLUMNS = ("name", "category", "portion")
+
+MenuRow = Tuple[int, int, str, str, str, int, int]
+
+
+# === Columnar Menu Snapshot ===
+class BranchColumns:
+    """
+    Immutable columnar rows of one branch (file order), one array per column,
+    plus {category: [offset, ...]}.
+    """
+
+    def __init__(self, rows: List[MenuRow]):
+        self.ints: Dict[str, array] = {col: array("q") for col in INT_COLUMNS}
+        self.strs: Dict[str, List[str]] = {col: [] for col in STR_COLUMNS}
+        for pos, col in enumerate(COLUMNS):
+            if col in self.ints:
+                self.ints[col].extend(row[pos] for row in rows)
+            else:
+                self.strs[col].extend(row[pos] for row in rows)
+        self.categories: Dict[str, List[int]] = _category_index(rows)
+
+    def __len__(self) -> int:
+        return len(self.ints["id"])
+
+    def row(self, offset: int) -> Dict[str, Any]:
+        return {
+            "id": self.ints["id"][offset],
+            "branch": self.ints["branch"][offset],
+            "name": self.strs["name"][offset],
+            "category": self.strs["category"][offset],
+            "portion": self.strs["portion"][offset],
+            "price": self.ints["price"][offset],
+            "serves": self.ints["serves"][offset],
+        }
+
+    def rows(self) -> List[MenuRow]:
+        """
+        Rows as tuples in COLUMNS order (used for diffing).
+        """
+        return list(zip(
+            self.ints["id"],
+            self.ints["branch"],
+            self.strs["name"],
+            self.strs["category"],
+            self.strs["portion"],
+            self.ints["price"],
+            self.ints["serves"],
+        ))
+
+
+class MenuColumns:
+    """
+    Immutable, branch-partitioned columnar view of menu.csv.
+
+    Each branch is its own BranchColumns partition. A reload builds new
+    partitions only for the branches in `changed` and shares the unchanged
+    partition objects of the previous snapshot (`reuse`).
+    """
+
+    def __init__(
+        self,
+        partitions: Dict[int, List[MenuRow]],
+        reuse: Optional["MenuColumns"] = None,
+        changed: Optional[Set[int]] = None,
+    ):
+        self.partitions: Dict[int, BranchColumns] = {}
+        for branch in sorted(partitions):
+            if reuse is not None and changed is not None and branch not in changed:
+                self.partitions[branch] = reuse.partitions[branch]
+            else:
+                self.partitions[branch] = BranchColumns(partitions[branch])
+
+    def __len__(self) -> int:
+        return sum(len(partition) for partition in self.partitions.values())
+
+    def partition(self, branch: int) -> List[MenuRow]:
+        """
+        Rows of one branch as tuples in COLUMNS order (used for diffing).
+        """
+        columns = self.partitions.get(branch)
+        return columns.rows() if columns is not None else []
+
+
+def _category_index(rows: List[MenuRow]) -> Dict[str, List[int]]:
+    category_pos = COLUMNS.index("category")
+    index: Dict[str, List[int]] = {}
+    for offset, row in enumerate(rows):
+        index.setdefault(row[category_pos], []).append(offset)
+    return index
+
+
+# === CSV Parsing ===
+def read_menu_partitions(path: str) -> Dict[int, List[MenuRow]]:
+    """
+    Parse menu.csv into typed row tuples grouped by branch.
+    Rows with non-numeric numeric fields are skipped.
+    """
+    partitions: Dict[int, List[MenuRow]] = {}
+    with open(path, mode='r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            try:
+                item = tuple(
+                    int(row[col]) if col in INT_COLUMNS else row[col]
+                    for col in COLUMNS
+                )
+            except (TypeError, ValueError):
+                continue
+            partitions.setdefault(item[1], []).append(item)
+    return partitions
+
+
+# === Menu Store ===
+class MenuStore:
+    """
+    In-memory menu store loaded once from menu.csv.
+    Lookups never touch the file and cost O(items in branch).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._columns: Optional[MenuColumns] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._columns is not None
+
+    def _read(self) -> Dict[int, List[MenuRow]]:
+        try:
+            return read_menu_partitions(self.path)
+        except FileNotFoundError:
+            print(f"File not found: {self.path}")
+        except Exception as e:
+            print(f"Error reading menu csv: {e}")
+        return {}
+
+    def load(self) -> MenuColumns:
+        """
+        Load the CSV and atomically swap in a fresh snapshot.
+        """
+        with self._lock:
+            columns = MenuColumns(self._read())
+            self._columns = columns
+            return columns
+
+    def reload(self) -> Set[int]:
+        """
+        Re-read the CSV, diff it against the current snapshot and rebuild
+        only the partitions that changed.
+        Returns the set of branches whose rows were added, changed or removed.
+        Read errors (missing or unreadable file) are raised and the current
+        snapshot is kept: an empty read must not look like every branch deleted.
+        """
+        with self._lock:
+            previous = self._columns
+            partitions = read_menu_partitions(self.path)
+
+            if previous is None:
+                self._columns = MenuColumns(partitions)
+                return set(partitions)
+
+            changed = {
+                branch
+                for branch in set(partitions) | set(previous.partitions)
+                if partitions.get(branch, []) != previous.partition(branch)
+            }
+            if changed:
+                self._columns = MenuColumns(partitions, reuse=previous, changed=changed)
+            return changed
+
+    def columns(self) -> MenuColumns:
+        columns = self._columns
+        if columns is None:
+            with self._lock:
+                columns = self._columns
+                if columns is None:
+                    columns = MenuColumns(self._read())
+                    self._columns = columns
+        return columns
+
+    def branches(self) -> List[int]:
+        return list(self.columns().partitions)
+
+    def fetch(self, branch: int) -> List[Dict[str, Any]]:
+        partition = self.columns().partitions.get(branch)
+        if partition is None:
+            return []
+        return [partition.row(offset) for offset in range(len(partition))]
+
+    def fetch_by_category(self, branch: int, category: str) -> List[Dict[str, Any]]:
+        partition = self.columns().partitions.get(branch)
+        if partition is None:
+            return []
+        return [partition.row(offset) for offset in partition.categories.get(category, [])]
@@ -0,0 +1,95 @@
+import csv
+import threading
+from typing import Dict, Optional, Set
+
+
+# === CSV Parsing ===
+def read_order_counts(path: str) -> Dict[int, Dict[str, int]]:
+    """
+    Parse orders.csv into per-branch item order counts.
+    Rows with a non-numeric branch are skipped.
+    """
+    counts: Dict[int, Dict[str, int]] = {}
+    with open(path, mode='r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            try:
+                row_branch = int(row['branch'])
+            except ValueError:
+                continue
+
+            branch_counts = counts.setdefault(row_branch, {})
+            item_name = row['item_name']
+            branch_counts[item_name] = branch_counts.get(item_name, 0) + 1
+    return counts
+
+
+# === Order Count Store ===
+class OrderCountStore:
+    """
+    In-memory per-branch order counts loaded once from orders.csv.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._counts: Optional[Dict[int, Dict[str, int]]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._counts is not None
+
+    def _read(self) -> Dict[int, Dict[str, int]]:
+        try:
+            return read_order_counts(self.path)
+        except FileNotFoundError:
+            print(f"File not found: {self.path}")
+        except Exception as e:
+            print(f"Error reading orders csv: {e}")
+        return {}
+
+    def reload(self) -> Set[int]:
+        """
+        Re-read the CSV and swap in only the branches whose counts changed.
+        Returns the set of changed branches.
+        Read errors are raised and the current counts are kept.
+        """
+        with self._lock:
+            previous = self._counts
+            counts = read_order_counts(self.path)
+
+            if previous is None:
+                self._counts = counts
+                return set(counts)
+
+            changed = {
+                branch
+                for branch in set(counts) | set(previous)
+                if counts.get(branch) != previous.get(branch)
+            }
+            if changed:
+                merged = {
+                    branch: previous[branch]
+                    for branch in previous
+                    if branch not in changed
+                }
+                merged.update({
+                    branch: counts[branch]
+                    for branch in changed
+                    if branch in counts
+                })
+                self._counts = merged
+            return changed
+
+    def counts(self) -> Dict[int, Dict[str, int]]:
+        counts = self._counts
+        if counts is None:
+            with self._lock:
+                counts = self._counts
+                if counts is None:
+                    counts = self._read()
+                    self._counts = counts
+        return counts
+
+    def fetch(self, branch: int) -> Dict[str, int]:
+        return dict(self.counts().get(branch, {}))
@@ -0,0 +1,77 @@
+import fcntl
+import json
+import os
+import threading
+from typing import Any, Dict, List
+
+
+# === Append-Only Store for Ingested Reviews ===
+class ReviewStore:
+    """
+    Reviews posted through the API, one JSON line per review
+    ({"item_id": ..., "review": {...}}), merged into the reviews menu on load.
+
+    Appends take an exclusive file lock, so several workers can write the
+    same file; each worker keeps what it has read and only parses lines
+    appended since (its own or another worker's).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._offset = 0
+        self._by_item: Dict[Any, List[Dict[str, Any]]] = {}
+        self._last_id = 0
+
+    def _read_new(self, f):
+        f.seek(self._offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                # Partial line of a concurrent append: read it next time
+                break
+            self._offset += len(line)
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            review = record["review"]
+            self._by_item.setdefault(record["item_id"], []).append(review)
+            self._last_id = max(self._last_id, review.get("id") or 0)
+
+    def reviews_by_item(self) -> Dict[Any, List[Dict[str, Any]]]:
+        """
+        Stored reviews grouped by item id (copies of the lists).
+        """
+        with self._lock:
+            if os.path.exists(self.path):
+                with open(self.path, "rb") as f:
+                    fcntl.flock(f, fcntl.LOCK_SH)
+                    try:
+                        self._read_new(f)
+                    finally:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+            return {item_id: list(reviews) for item_id, reviews in self._by_item.items()}
+
+    def append(self, item_id: Any, review: Dict[str, Any], min_id: int = 0) -> Dict[str, Any]:
+        """
+        Durably append a review, assigning it the next id above both the
+        stored reviews and `min_id`. Returns the stored review.
+        """
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a+b") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    self._read_new(f)
+                    review = dict(review, id=max(self._last_id, min_id) + 1)
+                    line = (json.dumps({"item_id": item_id, "review": review}) + "\n").encode("utf-8")
+                    f.seek(0, os.SEEK_END)
+                    f.write(line)
+                    f.flush()
+                    os.fsync(f.fileno())
+                    self._offset += len(line)
+                    self._by_item.setdefault(item_id, []).append(review)
+                    self._last_id = review["id"]
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+            return review
@@ -0,0 +1,88 @@
+import asyncio
+import os
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from db.executor import run_blocking
+
+# (inode, mtime_ns, size) of a watched file, None while the file is missing
+FileSignature = Optional[Tuple[int, int, int]]
+
+ReloadFn = Callable[[], Set[int]]
+ChangeCallback = Callable[[Set[int]], Awaitable[None]]
+
+
+def file_signature(path: str) -> FileSignature:
+    """
+    Identify a file version by inode, mtime and size.
+    Inode changes catch atomic replace (write temp file + rename), which is how
+    config maps and most editors update files inside containers.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+# === Polling Data File Watcher ===
+class DataFileWatcher:
+    """
+    Polls data files for changes using stat() only (no inotify), so it works on
+    bind mounts and overlay filesystems inside containers.
+
+    Each watched file has a reload function that re-reads the file and returns
+    the set of branches that changed, and an async callback that receives them.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._watches: List[Tuple[str, ReloadFn, Optional[ChangeCallback]]] = []
+        self._signatures: Dict[str, FileSignature] = {}
+
+    def watch(
+        self,
+        path: str,
+        reload: ReloadFn,
+        on_change: Optional[ChangeCallback] = None,
+    ):
+        self._watches.append((path, reload, on_change))
+        self._signatures[path] = file_signature(path)
+
+    async def poll_once(self) -> Dict[str, Set[int]]:
+        """
+        Check every watched file once and reload the ones that changed.
+        Returns {path: changed branches} for files whose content changed.
+        """
+        results: Dict[str, Set[int]] = {}
+        for path, reload, on_change in self._watches:
+            signature = file_signature(path)
+            if signature == self._signatures.get(path):
+                continue
+            self._signatures[path] = signature
+            if signature is None:
+                # Missing (e.g. mid-replace): keep the current data until the file is back
+                print(f"Data file missing, keeping current data: {path}")
+                continue
+
+            try:
+                changed = await run_blocking(reload)
+            except Exception as e:
+                print(f"Error reloading {path}: {e}")
+                continue
+
+            if not changed:
+                continue
+            print(f"Reloaded {os.path.basename(path)}: branches {sorted(changed)} changed")
+            results[path] = changed
+
+            if on_change is not None:
+                try:
+                    await on_change(changed)
+                except Exception as e:
+                    print(f"Error handling change of {path}: {e}")
+        return results
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.poll_once()
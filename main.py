@@ -1,12 +1,112 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from api.routes.recommend import router as recommend_router
 from api.routes.chatbot import router as chatbot_router
 from api.routes.reviews import router as reviews_router
+from cache.redis_cache import (
+    store_menus_in_cache,
+    delete_menu_from_cache,
+    store_reviews_menu_in_cache,
+    get_cache_status,
+)
+from core.config import settings
+from db.database import (
+    MENU_CSV,
+    ORDERS_CSV,
+    menu_store,
+    order_store,
+    fetch_menu,
+    fetch_menu_with_reviews,
+)
+from db.executor import run_blocking
+from db.watcher import DataFileWatcher
+from services.llm_clients import aclose_clients
+from services.menu_features import menu_features
+from services.review_events import review_events
+from services.reviews import annotate_sentiments
+from services import chatbot
+
+# === Menu Cache Refresh (called with branches changed in menu.csv) ===
+async def refresh_menu_cache(branches):
+    menus = {}
+    for branch in branches:
+        menu = await fetch_menu(branch)
+        if menu:
+            menus[branch] = menu
+        else:
+            await delete_menu_from_cache(branch)
+    await store_menus_in_cache(menus)
+    # Build scoring features for the new menu objects now rather than on the first request
+    for menu in menus.values():
+        menu_features(menu)
+
+# === Startup Cache Warm-up ===
+async def warm_up_caches(app: FastAPI):
+    """
+    Preload every branch in menu.csv into the cache in one pass, annotate the
+    reviews menu with sentiment and cache it, then mark the worker ready.
+    """
+    try:
+        # Load the data stores off the event loop
+        await run_blocking(menu_store.columns)
+        await run_blocking(order_store.counts)
+
+        menus = {}
+        for branch in menu_store.branches():
+            menus[branch] = await fetch_menu(branch)
+        await store_menus_in_cache(menus)
+        for menu in menus.values():
+            menu_features(menu)
+
+        reviews_menu = await fetch_menu_with_reviews()
+        # Sentiment is stored on each review, so it is cached with the menu
+        analyzed = annotate_sentiments(reviews_menu or [])
+        if reviews_menu:
+            await store_reviews_menu_in_cache(reviews_menu)
+
+        print(f"Warm-up complete: {len(menus)} branches cached, {analyzed} reviews annotated with sentiment")
+    except Exception as e:
+        # A failed warm-up only means cold caches; serve traffic anyway
+        print(f"Warm-up error: {e}")
+    finally:
+        app.state.ready = True
+
+# === Application Lifespan ===
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ready = False
+    warmup_task = asyncio.create_task(warm_up_caches(app))
+
+    # Embedding model and FAISS index load in a background thread; /api/chatbot
+    # answers "warming up" until they are ready
+    if settings.CHATBOT_PRELOAD:
+        chatbot.start_warm_up()
+
+    watcher_task = None
+    if settings.DATA_WATCH_INTERVAL > 0:
+        watcher = DataFileWatcher(settings.DATA_WATCH_INTERVAL)
+        watcher.watch(MENU_CSV, menu_store.reload, refresh_menu_cache)
+        watcher.watch(ORDERS_CSV, order_store.reload)
+        watcher_task = asyncio.create_task(watcher.run())
+
+    # One review event subscription per worker, shared by all live websockets
+    await review_events.start()
+
+    yield
+
+    warmup_task.cancel()
+    if watcher_task is not None:
+        watcher_task.cancel()
+    await review_events.aclose()
+    await aclose_clients()
 
 # === Initialize FastAPI App ===
-app = FastAPI(title="Restaurant Recommendation API")
+app = FastAPI(title="Restaurant Recommendation API", lifespan=lifespan)
 
 # === Root Endpoint ===
 @app.get("/")
@@ -14,9 +114,15 @@ def home():
     return {"message": "Restaurant Recommendation API Running"}
 
 # === Health Check Endpoint ===
+# Returns 503 until startup warm-up finishes so load balancers skip cold workers
 @app.get("/health")
 def health():
-    return {"status": "ok"}
+    if not getattr(app.state, "ready", False):
+        return JSONResponse(
+            status_code=503,
+            content={"status": "warming_up", "cache": get_cache_status()},
+        )
+    return {"status": "ok", "cache": get_cache_status()}
 
 # === Configure CORS Middleware ===
 app.add_middleware(
@@ -0,0 +1,13 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+import datetime
+
+# === New Review Schema ===
+class ReviewCreate(BaseModel):
+    item_id: int = Field(description="Menu item the review is for")
+    review: str = Field(min_length=1, max_length=2000, description="Review text")
+    customer_name: str = Field(min_length=1, max_length=100, description="Reviewer name")
+    date: Optional[datetime.date] = Field(
+        default=None,
+        description="YYYY-MM-DD, defaults to today"
+    )
@@ -0,0 +1,126 @@
+import hashlib
+import re
+from typing import Any, Iterable, List, Sequence, Tuple
+
+# Rough tokens-per-character ratio for English text with a BPE tokenizer;
+# avoids loading a tokenizer just to size the prompt
+CHARS_PER_TOKEN = 4
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut text to about `max_tokens` at a word boundary, marking the cut with "...".
+    """
+    if max_tokens <= 0:
+        return ""
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text[:max(0, limit - 3)]
+    space = cut.rfind(" ")
+    if space > limit // 2:
+        cut = cut[:space]
+    return cut.rstrip() + "..."
+
+
+def _normalized(text: str) -> str:
+    return _WHITESPACE.sub(" ", text).strip().lower()
+
+
+# === Retrieved Context ===
+def build_context(chunks: Iterable[str], max_tokens: int) -> Tuple[str, int]:
+    """
+    Join retrieved chunks (most relevant first) into the prompt context.
+
+    - Exact duplicates (ignoring case / whitespace) and chunks contained in an
+      already selected chunk are dropped.
+    - Chunks are added in relevance order until `max_tokens` is reached; a chunk
+      that does not fit is skipped so a shorter, less relevant one may still fit.
+      The most relevant chunk is truncated rather than dropped.
+
+    Returns (context, estimated tokens).
+    """
+    selected: List[str] = []
+    seen = set()
+    normalized_selected: List[str] = []
+    used = 0
+    separator = estimate_tokens("\n\n")
+
+    for chunk in chunks:
+        text = chunk.strip()
+        if not text:
+            continue
+        norm = _normalized(text)
+        digest = hashlib.blake2b(norm.encode("utf-8"), digest_size=16).digest()
+        if digest in seen or any(norm in other for other in normalized_selected):
+            continue
+        seen.add(digest)
+
+        cost = estimate_tokens(text) + (separator if selected else 0)
+        if used + cost > max_tokens:
+            if selected:
+                continue
+            text = truncate_to_tokens(text, max_tokens)
+            if not text:
+                break
+            cost = estimate_tokens(text)
+
+        selected.append(text)
+        normalized_selected.append(norm)
+        used += cost
+
+    return "\n\n".join(selected), used
+
+
+# === Conversation History ===
+def _field(message: Any, name: str) -> str:
+    if isinstance(message, dict):
+        return message.get(name) or ""
+    return getattr(message, name, "") or ""
+
+
+def compact_history(
+    history: Sequence[Any],
+    max_tokens: int,
+    max_messages: int,
+    max_message_tokens: int,
+) -> str:
+    """
+    Bounded-size transcript of the most recent conversation turns.
+
+    Walks back from the newest message, keeping at most `max_messages`
+    messages, each cut to `max_message_tokens`, until `max_tokens` is used.
+    Older messages are replaced by a one-line note so the model knows the
+    transcript is partial.
+    """
+    if not history or max_tokens <= 0 or max_messages <= 0:
+        return ""
+
+    lines: List[str] = []
+    used = 0
+    for message in reversed(history):
+        text = _WHITESPACE.sub(" ", _field(message, "message")).strip()
+        if not text:
+            continue
+        role = "User" if _field(message, "role") == "user" else "Assistant"
+        line = f"{role}: {truncate_to_tokens(text, max_message_tokens)}"
+        cost = estimate_tokens(line) + 1
+        if len(lines) >= max_messages or used + cost > max_tokens:
+            break
+        lines.append(line)
+        used += cost
+
+    omitted = sum(1 for m in history if _field(m, "message").strip()) - len(lines)
+    if omitted > 0:
+        lines.append(f"({omitted} earlier message(s) omitted)")
+    return "\n".join(reversed(lines))
+
+
+def has_user_turns(history: Sequence[Any]) -> bool:
+    return any(_field(message, "role") == "user" for message in history)
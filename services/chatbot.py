@@ -1,33 +1,28 @@
-from typing import List, Dict
-from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime, timezone
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough
-from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_groq import ChatGroq
 from dotenv import load_dotenv
 
-load_dotenv()
-
-# ================= Embeddings =================
-embeddings = HuggingFaceEmbeddings(
-    model_name="sentence-transformers/all-MiniLM-L6-v2"
-)
+from core.config import settings
+from services.chat_context import build_context, compact_history, has_user_turns
+from services.embedding_cache import QueryEmbedder
+from services.llm_clients import get_chat_model
+from services.semantic_cache import SemanticCache
+from services.vector_index import BranchSearcher, load_embeddings, load_vectorstore, resolve_index_dir
 
-# ================= Vector DB =================
-vectorstore = FAISS.load_local(
-    "./vector_db",
-    embeddings,
-    allow_dangerous_deserialization=True
-)
+load_dotenv()
 
-retriever = vectorstore.as_retriever(search_kwargs={"k": 8})
+RETRIEVAL_K = 8
+# Seconds between checks for a newly published index version
+INDEX_CHECK_INTERVAL = 5.0
 
-# ================= LLM =================
-llm = ChatGroq(
-    model="groq/compound-mini",
-    temperature=0
+WARMING_UP_MESSAGE = (
+    "The assistant is still warming up. Please try again in a few seconds."
 )
 
 # ================= Prompt =================
@@ -40,40 +35,268 @@ prompt = ChatPromptTemplate.from_messages([
     ),
     (
         "human",
-        "Context:\n{context}\n\nQuestion:\n{question}"
+        "Conversation so far:\n{history}\n\nContext:\n{context}\n\nQuestion:\n{question}"
     )
 ])
 
-# ================= Runnable Chain =================
-chatbot_chain = (
-    {
-        "context": retriever,
-        "question": RunnablePassthrough()
-    }
-    | prompt
-    | llm
-    | StrOutputParser()
+
+# ================= Lazy Runtime =================
+# The embedding model, FAISS index and Groq client are heavy (seconds to load),
+# so they are built on first use or by a background warm-up instead of at
+# import time; workers that only serve /recommend never pay for them.
+class ChatbotRuntime:
+    def __init__(self):
+        # ================= Embeddings =================
+        self.embeddings = load_embeddings()
+        self.embedder = QueryEmbedder(
+            self.embeddings,
+            max_items=settings.EMBED_CACHE_MAX_ITEMS,
+            batch_window=settings.EMBED_BATCH_WINDOW_MS / 1000,
+            max_batch=settings.EMBED_MAX_BATCH,
+        )
+
+        # ================= Vector DB =================
+        self.index_version = index_version()
+        self.searcher = BranchSearcher(load_vectorstore(
+            self.embeddings,
+            index_type=settings.VECTOR_INDEX_TYPE,
+            nprobe=settings.VECTOR_INDEX_NPROBE,
+        ))
+        self._index_checked_at = time.monotonic()
+        self._reload_lock = threading.Lock()
+
+        # ================= LLM =================
+        self.llm = get_chat_model("groq/compound-mini", temperature=0)
+
+        # ================= Runnable Chain =================
+        # Retrieval happens before the chain so the question embedding is
+        # computed once and shared with the semantic answer cache
+        self.chain = prompt | self.llm | StrOutputParser()
+
+    async def embed(self, question: str) -> List[float]:
+        return await self.embedder.embed(question)
+
+    async def retrieve(self, vector: List[float], branch: Optional[int] = None) -> str:
+        """
+        Retrieved documents, deduplicated and trimmed to the context token budget.
+        """
+        docs = await asyncio.to_thread(
+            self.searcher.search, vector, RETRIEVAL_K, branch
+        )
+        context, _ = build_context(
+            (doc.page_content for doc in docs),
+            settings.CHAT_CONTEXT_MAX_TOKENS,
+        )
+        return context
+
+    def _reload_index(self, version: Tuple):
+        try:
+            searcher = BranchSearcher(load_vectorstore(
+                self.embeddings,
+                index_type=settings.VECTOR_INDEX_TYPE,
+                nprobe=settings.VECTOR_INDEX_NPROBE,
+            ))
+            # Swap references; in-flight searches keep using the old store
+            self.searcher = searcher
+            self.index_version = version
+            print(f"Vector index reloaded from {version[0]}")
+        except Exception as e:
+            print(f"Vector index reload error: {e}")
+        finally:
+            self._reload_lock.release()
+
+    def check_index(self):
+        """
+        Reload the index in the background when a new version was published
+        (services.vector_index build). Checked at most every INDEX_CHECK_INTERVAL.
+        """
+        now = time.monotonic()
+        if now - self._index_checked_at < INDEX_CHECK_INTERVAL:
+            return
+        self._index_checked_at = now
+
+        version = index_version()
+        if version != self.index_version and self._reload_lock.acquire(blocking=False):
+            threading.Thread(
+                target=self._reload_index,
+                args=(version,),
+                name="vector-index-reload",
+                daemon=True,
+            ).start()
+
+
+def index_version() -> Tuple:
+    """
+    Identify the active on-disk vector index by directory and file inode, mtime and size.
+    """
+    index_dir = resolve_index_dir()
+    version = [index_dir]
+    for name in ("index.faiss", "index.pkl"):
+        try:
+            st = os.stat(os.path.join(index_dir, name))
+            version.append((st.st_ino, st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            version.append(None)
+    return tuple(version)
+
+
+# ================= Semantic Answer Cache =================
+answer_cache = SemanticCache(
+    threshold=settings.CHAT_CACHE_THRESHOLD,
+    ttl=settings.CHAT_CACHE_TTL,
+    max_items=settings.CHAT_CACHE_MAX_ITEMS,
 )
 
 
+_runtime: Optional[ChatbotRuntime] = None
+_runtime_lock = threading.Lock()
+_warmup_thread: Optional[threading.Thread] = None
+
+
+def load_runtime() -> ChatbotRuntime:
+    """
+    Build the chatbot runtime once (thread-safe) and return it.
+    """
+    global _runtime
+    if _runtime is None:
+        with _runtime_lock:
+            if _runtime is None:
+                _runtime = ChatbotRuntime()
+                print("Chatbot runtime ready")
+    return _runtime
 
-# ================= Chat Function =================
-from typing import List
-from datetime import datetime
-from datetime import datetime, timezone
 
-datetime.now(timezone.utc).isoformat()
+def is_ready() -> bool:
+    return _runtime is not None
 
-def chat(new_message: str, history: List) -> dict:
-    reply_text = chatbot_chain.invoke(new_message)
 
+def _warm_up():
+    try:
+        load_runtime()
+    except Exception as e:
+        print(f"Chatbot warm-up error: {e}")
+
+
+def start_warm_up():
+    """
+    Load the runtime in a background thread if it is not loaded or loading yet.
+    """
+    global _warmup_thread
+    if is_ready():
+        return
+    with _runtime_lock:
+        if _warmup_thread is not None and _warmup_thread.is_alive():
+            return
+        _warmup_thread = threading.Thread(
+            target=_warm_up,
+            name="chatbot-warmup",
+            daemon=True,
+        )
+        _warmup_thread.start()
+
+
+# ================= Chat Function =================
+def _bot_message(history: List, text: str) -> dict:
     last_id = history[-1].id if history else 0
 
     return {
-    "id": last_id + 1,
-    "role": "bot",
-    "message": reply_text,
-    "time": datetime.now(timezone.utc).isoformat()
-}
+        "id": last_id + 1,
+        "role": "bot",
+        "message": text,
+        "time": datetime.now(timezone.utc).isoformat()
+    }
+
+
+def _cacheable(history: List) -> bool:
+    # Follow-up questions ("and the vegan one?") depend on the conversation,
+    # so only standalone questions use the semantic answer cache
+    return not has_user_turns(history)
+
+
+def _prompt_inputs(question: str, context: str, history: List) -> dict:
+    compacted = compact_history(
+        history,
+        max_tokens=settings.CHAT_HISTORY_MAX_TOKENS,
+        max_messages=settings.CHAT_HISTORY_MAX_MESSAGES,
+        max_message_tokens=settings.CHAT_HISTORY_MESSAGE_MAX_TOKENS,
+    )
+    return {
+        "history": compacted or "(none)",
+        "context": context,
+        "question": question,
+    }
+
+
+async def _prepare(
+    runtime: ChatbotRuntime,
+    question: str,
+    history: List,
+    branch: Optional[int],
+) -> Tuple[List[float], Optional[str]]:
+    """
+    Embed the question and look it up in the semantic answer cache (per branch).
+    """
+    runtime.check_index()
+    answer_cache.ensure_version(runtime.index_version)
+    vector = await runtime.embed(question)
+    if not _cacheable(history):
+        return vector, None
+    return vector, answer_cache.lookup(vector, scope=branch)
+
+
+async def achat(new_message: str, history: List, branch: Optional[int] = None) -> dict:
+    """
+    Async chat: retrieval and the LLM call run without holding a threadpool thread.
+    Near-duplicate questions are answered from the semantic cache.
+    With a branch, retrieval only searches that branch's (and shared) documents.
+    """
+    if not is_ready():
+        start_warm_up()
+        return _bot_message(history, WARMING_UP_MESSAGE)
+
+    runtime = load_runtime()
+    vector, cached = await _prepare(runtime, new_message, history, branch)
+    if cached is not None:
+        return _bot_message(history, cached)
+
+    context = await runtime.retrieve(vector, branch)
+    reply_text = await runtime.chain.ainvoke(_prompt_inputs(new_message, context, history))
+    if _cacheable(history):
+        answer_cache.store(vector, reply_text, scope=branch)
+
+    return _bot_message(history, reply_text)
+
+
+async def astream_chat(
+    new_message: str,
+    history: List,
+    branch: Optional[int] = None,
+) -> AsyncIterator[dict]:
+    """
+    Stream a chat reply.
+    Yields {"token": str} for each chunk as the LLM produces it, then the
+    complete bot message ({"message": {...}}).
+    """
+    if not is_ready():
+        start_warm_up()
+        yield {"message": _bot_message(history, WARMING_UP_MESSAGE)}
+        return
+
+    runtime = load_runtime()
+    vector, cached = await _prepare(runtime, new_message, history, branch)
+    if cached is not None:
+        yield {"token": cached}
+        yield {"message": _bot_message(history, cached)}
+        return
 
+    context = await runtime.retrieve(vector, branch)
+    parts = []
+    async for token in runtime.chain.astream(_prompt_inputs(new_message, context, history)):
+        if token:
+            parts.append(token)
+            yield {"token": token}
 
+    reply_text = "".join(parts)
+    if _cacheable(history):
+        answer_cache.store(vector, reply_text, scope=branch)
+    yield {"message": _bot_message(history, reply_text)}
@@ -0,0 +1,219 @@
+from itertools import combinations
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.menu_features import MenuFeatures, menu_features
+from services.recommendation import (
+    MEAL_PRIORITY,
+    InternalQuestion,
+    calculate_quantity,
+    get_budget_range,
+)
+from utils.scoring import MOOD_KEYWORDS
+
+# === Search Limits ===
+# Candidates kept per role (by score) before enumerating deal combinations
+MAX_MAINS = 6
+MAX_SIDES = 6
+MAX_DRINKS = 4
+# Deals sharing more than this fraction of items with a chosen deal are skipped
+MAX_OVERLAP = 0.4
+
+# Score weights: mood keyword, craving named in the item, spice keyword, meal-time category
+SCORE_WEIGHTS = np.array([2.0, 2.0, 1.0, 0.5])
+
+# Categories excluded for a "healthy" craving (same rule as the LLM prompt)
+UNHEALTHY_CATEGORIES = {"Pizza", "Burger", "BBQ", "Dessert", "Fries", "Onion Rings", "Nachos"}
+
+# Roles as returned by MenuFeatures.roles (infer_role_from_data)
+ROLE_MAIN, ROLE_SIDE, ROLE_DRINK = 0, 1, 2
+
+
+# === Preference Scoring ===
+def _restriction_terms(avoid: str) -> List[str]:
+    return [t.strip().lower() for t in (avoid or "").replace(";", ",").split(",") if t.strip()]
+
+
+def _mood_key(mood: str) -> str:
+    """
+    Map a free-text craving ("cheesy", "spicy") onto the mood_match keys ("cheesy_mood", ...).
+    """
+    mood = (mood or "").strip().lower()
+    for key in MOOD_KEYWORDS:
+        if mood == key or (mood and key.split("_")[0] == mood.split()[0]):
+            return key
+    return mood
+
+
+def score_items(features: MenuFeatures, q: InternalQuestion, priority: Sequence[str]) -> np.ndarray:
+    """
+    Preference score per menu item: craving and spice keyword matches, then
+    meal-time category. One weighted sum over the precomputed flag columns.
+    """
+    mood = (q.mood or "").strip().lower()
+    flags = np.column_stack([
+        features.mood_column(_mood_key(mood)),
+        features.contains_any([mood]) if mood else np.zeros(features.size, dtype=bool),
+        features.spice_column((q.spice_lvl or "").strip().lower()),
+        features.category_mask(priority),
+    ])
+    return 1.0 + flags @ SCORE_WEIGHTS
+
+
+def eligible_mask(features: MenuFeatures, q: InternalQuestion) -> np.ndarray:
+    """
+    Meal-time categories, minus dietary restrictions (name / category match)
+    and, for a healthy craving, unhealthy categories.
+    """
+    mask = features.meal_time_mask(MEAL_PRIORITY.get(q.meal_time))
+    restrictions = _restriction_terms(q.avoid_anything)
+    if restrictions:
+        mask &= ~features.contains_any(restrictions)
+    if _mood_key(q.mood) == "healthy_choice":
+        mask &= ~features.category_mask(UNHEALTHY_CATEGORIES)
+    return mask & (features.serves > 0)
+
+
+# === Deal Construction ===
+Line = Tuple[Dict, int]  # (candidate item, quantity)
+
+
+def _line(item: Dict, qty: int) -> Dict:
+    return {
+        "name": item["name"],
+        "category": item["category"],
+        "qty": qty,
+        "serves_each": item["serves"],
+        "unit_price": item["price"],
+        "total_price": qty * item["price"],
+    }
+
+
+def _main_lines(mains: Sequence[Dict], peoples: int) -> List[Line]:
+    # Mains split the party between them
+    share = calculate_quantity(peoples, len(mains))
+    return [(item, calculate_quantity(share, item["serves"])) for item in mains]
+
+
+def _deal_value(lines: List[Line], cost: int, ideal_budget: int) -> float:
+    # Average (not total) preference score so deals are not padded with extra items
+    value = sum(item["_score"] for item, _ in lines) / len(lines)
+    # Reward a balanced meal, penalize spending past the ideal budget
+    value += 0.5 * len({item["_role"] for item, _ in lines})
+    if cost > ideal_budget:
+        value -= 4.0 * (cost - ideal_budget) / max(1, ideal_budget)
+    return value
+
+
+def _explain(lines: List[Line], q: InternalQuestion, cost: int, ideal_budget: int) -> str:
+    names = ", ".join(item["name"] for item, _ in lines)
+    fit = "within" if cost <= ideal_budget else "slightly above"
+    return (
+        f"{names} for {q.peoples} people at {cost} PKR, {fit} the ideal budget of "
+        f"{ideal_budget} PKR, picked for a {q.mood or 'any'} craving at {q.meal_time or 'any time'}."
+    )
+
+
+def optimize_deals(
+    menu: List[Dict],
+    q: InternalQuestion,
+    ideal_budget: Optional[int] = None,
+    hard_budget: Optional[int] = None,
+    count: int = 3,
+) -> List[Dict]:
+    """
+    Deterministic local recommendation: up to `count` diverse deals that cover
+    the party and stay within the hard budget, in the same shape as
+    build_deals_from_groq_response.
+
+    Items are filtered by meal time, dietary restrictions and mood, scored by
+    preference, and grouped by inferred role, all as vectorized operations on
+    the menu's precomputed feature matrix (services.menu_features).
+    Combinations of 1-2 mains, 0-2 sides and 0-1 drink are enumerated
+    cheapest-first per role, pruning any branch that already exceeds the hard
+    budget; the best-valued deals are then picked greedily while skipping
+    near-duplicates.
+    """
+    if ideal_budget is None or hard_budget is None:
+        _, ideal_budget, hard_budget = get_budget_range(q.peoples, q.budget, q.mood)
+
+    features = menu_features(menu)
+    eligible = eligible_mask(features, q)
+    if not eligible.any():
+        return []
+
+    scores = score_items(features, q, MEAL_PRIORITY.get(q.meal_time, []))
+    roles = features.roles(float(features.price[eligible].mean()))
+
+    def top(role: int, limit: int) -> List[Dict]:
+        """
+        Best-scoring eligible items of a role (ties: cheaper, then name), returned cheapest-first.
+        """
+        idx = np.flatnonzero(eligible & (roles == role))
+        if role == ROLE_MAIN and idx.size == 0:
+            # Without a "main" (e.g. a breakfast menu of single items) anything can anchor a deal
+            idx = np.flatnonzero(eligible)
+        best = idx[np.lexsort((features.names[idx], features.price[idx], -scores[idx]))[:limit]]
+        best = best[np.lexsort((features.names[best], features.price[best]))]
+        return [
+            dict(menu[i], _index=int(i), _role=int(roles[i]), _score=float(scores[i]))
+            for i in best
+        ]
+
+    mains = top(ROLE_MAIN, MAX_MAINS)
+    sides = top(ROLE_SIDE, MAX_SIDES)
+    drinks = top(ROLE_DRINK, MAX_DRINKS)
+    peoples = q.peoples
+
+    found: List[Tuple[float, int, List[Line]]] = []
+    for n_mains in (1, 2):
+        for main_items in combinations(mains, n_mains):
+            main_lines = _main_lines(main_items, peoples)
+            main_cost = sum(item["price"] * qty for item, qty in main_lines)
+            if main_cost > hard_budget:
+                continue
+            main_index = {item["_index"] for item in main_items}
+            for n_sides in (0, 1, 2):
+                for side_items in combinations(sides, n_sides):
+                    if any(s["_index"] in main_index for s in side_items):
+                        continue
+                    side_lines = [(s, calculate_quantity(peoples, 2 * s["serves"])) for s in side_items]
+                    side_cost = main_cost + sum(s["price"] * qty for s, qty in side_lines)
+                    if side_cost > hard_budget:
+                        continue
+                    for drink in [None] + drinks:
+                        lines = main_lines + side_lines
+                        cost = side_cost
+                        if drink is not None:
+                            if drink["_index"] in main_index:
+                                continue
+                            qty = calculate_quantity(peoples, drink["serves"])
+                            cost += qty * drink["price"]
+                            if cost > hard_budget:
+                                continue
+                            lines = lines + [(drink, qty)]
+                        found.append((_deal_value(lines, cost, ideal_budget), cost, lines))
+
+    found.sort(key=lambda d: (-d[0], d[1], [item["name"] for item, _ in d[2]]))
+    chosen: List[Tuple[float, int, List[Line]]] = []
+    for deal in found:
+        names = {item["name"] for item, _ in deal[2]}
+        if any(
+            len(names & {item["name"] for item, _ in other[2]}) / len(names | {item["name"] for item, _ in other[2]}) > MAX_OVERLAP
+            for other in chosen
+        ):
+            continue
+        chosen.append(deal)
+        if len(chosen) == count:
+            break
+
+    return [
+        {
+            "deal_number": number,
+            "items": [_line(item, qty) for item, qty in lines],
+            "total_cost": cost,
+            "explanation": _explain(lines, q, cost, ideal_budget),
+        }
+        for number, (_, cost, lines) in enumerate(chosen, start=1)
+    ]
@@ -0,0 +1,96 @@
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def normalize_query(text: str) -> str:
+    """
+    Cache key for a query: lowercased with whitespace collapsed.
+    all-MiniLM-L6-v2 uses an uncased tokenizer, so this does not change the embedding.
+    """
+    return " ".join(text.lower().split())
+
+
+# === Cached, Micro-Batched Query Embedder ===
+class QueryEmbedder:
+    """
+    Wraps a LangChain embeddings model for query embedding.
+
+    - LRU cache of embeddings keyed by normalized text.
+    - Concurrent requests for the same text share one computation.
+    - Requests arriving within `batch_window` seconds (or up to `max_batch`)
+      are encoded together with one `embed_documents` call in a worker
+      thread, which is far cheaper per text on CPU than one call each.
+    """
+
+    def __init__(self, embeddings: Any, max_items: int, batch_window: float, max_batch: int):
+        self.embeddings = embeddings
+        self.max_items = max_items
+        self.batch_window = batch_window
+        self.max_batch = max(1, max_batch)
+
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._inflight: Dict[str, "asyncio.Future[List[float]]"] = {}
+        self._pending: List[Tuple[str, "asyncio.Future[List[float]]"]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    def cached(self, text: str) -> Optional[List[float]]:
+        key = normalize_query(text)
+        vector = self._cache.get(key)
+        if vector is not None:
+            self._cache.move_to_end(key)
+        return vector
+
+    async def embed(self, text: str) -> List[float]:
+        key = normalize_query(text)
+        vector = self._cache.get(key)
+        if vector is not None:
+            self._cache.move_to_end(key)
+            return vector
+
+        future = self._inflight.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._inflight[key] = future
+            self._pending.append((key, future))
+
+            if len(self._pending) >= self.max_batch or self.batch_window <= 0:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.batch_window, self._flush)
+
+        return await asyncio.shield(future)
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.ensure_future(self._run_batch(batch))
+
+    async def _run_batch(self, batch: List[Tuple[str, "asyncio.Future[List[float]]"]]):
+        texts = [key for key, _ in batch]
+        try:
+            vectors = await asyncio.to_thread(self.embeddings.embed_documents, texts)
+        except Exception as e:
+            for key, future in batch:
+                self._inflight.pop(key, None)
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (key, future), vector in zip(batch, vectors):
+            self._inflight.pop(key, None)
+            self._remember(key, vector)
+            if not future.done():
+                future.set_result(vector)
+
+    def _remember(self, key: str, vector: List[float]):
+        if self.max_items <= 0:
+            return
+        self._cache[key] = vector
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_items:
+            self._cache.popitem(last=False)
@@ -0,0 +1,90 @@
+import threading
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from core.config import settings
+
+
+# === Shared HTTP Clients ===
+# One pooled client per process: connections to the Groq API stay alive between
+# requests instead of paying a TCP + TLS handshake for every LLM call
+_http_lock = threading.Lock()
+_async_http: Optional[httpx.AsyncClient] = None
+_sync_http: Optional[httpx.Client] = None
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.GROQ_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.GROQ_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.GROQ_KEEPALIVE_EXPIRY,
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(settings.GROQ_TIMEOUT, connect=settings.GROQ_CONNECT_TIMEOUT)
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    global _async_http
+    if _async_http is None or _async_http.is_closed:
+        with _http_lock:
+            if _async_http is None or _async_http.is_closed:
+                _async_http = httpx.AsyncClient(limits=_limits(), timeout=_timeout())
+    return _async_http
+
+
+def get_http_client() -> httpx.Client:
+    global _sync_http
+    if _sync_http is None or _sync_http.is_closed:
+        with _http_lock:
+            if _sync_http is None or _sync_http.is_closed:
+                _sync_http = httpx.Client(limits=_limits(), timeout=_timeout())
+    return _sync_http
+
+
+# === Chat Model Registry ===
+_models: Dict[Tuple[str, float], object] = {}
+_models_lock = threading.Lock()
+
+
+def get_chat_model(model: str, temperature: float = 0.0):
+    """
+    Return the shared ChatGroq client for (model, temperature), creating it on first use.
+    All clients share the pooled HTTP clients and the configured timeout / retries.
+    """
+    key = (model, temperature)
+    llm = _models.get(key)
+    if llm is None:
+        with _models_lock:
+            llm = _models.get(key)
+            if llm is None:
+                from langchain_groq import ChatGroq
+
+                llm = ChatGroq(
+                    groq_api_key=settings.GROQ_API_KEY,
+                    model_name=model,
+                    temperature=temperature,
+                    request_timeout=settings.GROQ_TIMEOUT,
+                    max_retries=settings.GROQ_MAX_RETRIES,
+                    http_client=get_http_client(),
+                    http_async_client=get_async_http_client(),
+                )
+                _models[key] = llm
+    return llm
+
+
+async def aclose_clients():
+    """
+    Close the pooled HTTP clients (application shutdown).
+    """
+    global _async_http, _sync_http
+    with _models_lock:
+        _models.clear()
+    if _async_http is not None:
+        await _async_http.aclose()
+        _async_http = None
+    if _sync_http is not None:
+        _sync_http.close()
+        _sync_http = None
@@ -0,0 +1,129 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.config import settings
+from utils.scoring import MOOD_KEYWORDS, SPICE_KEYWORDS
+
+MOODS = tuple(MOOD_KEYWORDS)
+SPICE_LEVELS = tuple(SPICE_KEYWORDS)
+
+
+def _keyword_flags(names: np.ndarray, table: Dict[str, Tuple[str, ...]]) -> np.ndarray:
+    """
+    (items x table keys) bool matrix: does the lowercased name contain any keyword of each key.
+    """
+    flags = np.zeros((names.size, len(table)), dtype=bool)
+    for column, words in enumerate(table.values()):
+        for word in words:
+            flags[:, column] |= np.char.find(names, word) >= 0
+    return flags
+
+
+# === Per-Menu Feature Matrix ===
+class MenuFeatures:
+    """
+    Column arrays for one branch menu, built once per menu list:
+
+        price, serves     int arrays
+        category_codes    index into `categories`
+        mood_flags        items x MOODS (utils.scoring.mood_match per mood)
+        spice_flags       items x SPICE_LEVELS (spice_match per level)
+        names / texts     lowercased name, and "name category" for substring filters
+
+    Request-time filtering and scoring are boolean masks and dot products
+    over these arrays instead of per-item string scans.
+    """
+
+    def __init__(self, menu: List[Dict]):
+        self.menu = menu
+        self.size = len(menu)
+        self.price = np.fromiter((item["price"] for item in menu), dtype=np.int64, count=self.size)
+        self.serves = np.fromiter((item["serves"] for item in menu), dtype=np.int64, count=self.size)
+
+        category_index: Dict[str, int] = {}
+        codes = []
+        for item in menu:
+            codes.append(category_index.setdefault(item["category"], len(category_index)))
+        self.categories: List[str] = list(category_index)
+        self._category_index = category_index
+        self.category_codes = np.asarray(codes, dtype=np.int32)
+
+        self.names = np.asarray([item["name"].lower() for item in menu], dtype=str)
+        self.texts = np.asarray(
+            [f"{item['name']} {item['category']}".lower() for item in menu], dtype=str
+        )
+        self.mood_flags = _keyword_flags(self.names, MOOD_KEYWORDS)
+        self.spice_flags = _keyword_flags(self.names, SPICE_KEYWORDS)
+
+    # === Masks ===
+    def category_mask(self, categories: Iterable[str]) -> np.ndarray:
+        codes = [self._category_index[c] for c in categories if c in self._category_index]
+        return np.isin(self.category_codes, codes)
+
+    def contains_any(self, terms: Sequence[str]) -> np.ndarray:
+        """
+        Items whose lowercased "name category" contains any of `terms`.
+        """
+        mask = np.zeros(self.size, dtype=bool)
+        for term in terms:
+            mask |= np.char.find(self.texts, term.lower()) >= 0
+        return mask
+
+    def meal_time_mask(self, priority: Optional[Sequence[str]]) -> np.ndarray:
+        """
+        Items in the meal-time categories; every item if there are none or none match.
+        """
+        if not priority:
+            return np.ones(self.size, dtype=bool)
+        mask = self.category_mask(priority)
+        return mask if mask.any() else np.ones(self.size, dtype=bool)
+
+    # === Scores ===
+    def mood_column(self, mood: str) -> np.ndarray:
+        if mood in MOOD_KEYWORDS:
+            return self.mood_flags[:, MOODS.index(mood)]
+        return np.zeros(self.size, dtype=bool)
+
+    def spice_column(self, spice: str) -> np.ndarray:
+        if spice in SPICE_KEYWORDS:
+            return self.spice_flags[:, SPICE_LEVELS.index(spice)]
+        return np.zeros(self.size, dtype=bool)
+
+    def roles(self, avg_price: float) -> np.ndarray:
+        """
+        Vectorized infer_role_from_data: 0 = main, 1 = side, 2 = drink.
+        """
+        role = np.ones(self.size, dtype=np.int8)
+        role[(self.serves == 1) & (self.price <= avg_price * 0.6)] = 2
+        role[(self.serves >= 2) & (self.price >= avg_price)] = 0
+        return role
+
+    def select(self, mask: np.ndarray) -> List[Dict]:
+        return [self.menu[i] for i in np.flatnonzero(mask)]
+
+
+# === Feature Cache (keyed on the menu list object) ===
+# Menus served from the L1 cache are the same list object until the entry is
+# replaced, so identity is a free and exact cache key. Holding the list keeps
+# its id from being reused while the entry lives.
+_features: "OrderedDict[int, MenuFeatures]" = OrderedDict()
+_features_lock = threading.Lock()
+
+
+def menu_features(menu: List[Dict]) -> MenuFeatures:
+    key = id(menu)
+    with _features_lock:
+        features = _features.get(key)
+        if features is not None and features.menu is menu:
+            _features.move_to_end(key)
+            return features
+
+    features = MenuFeatures(menu)
+    with _features_lock:
+        _features[key] = features
+        while len(_features) > max(1, settings.CACHE_L1_MAX_ITEMS):
+            _features.popitem(last=False)
+    return features
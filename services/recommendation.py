@@ -1,16 +1,25 @@
 import math
 import json
-from typing import List, Dict, Any
+import asyncio
+import hashlib
+from typing import List, Dict, Any, Tuple
 
-from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
 
-from db.database import fetch_menu
-from cache.redis_cache import get_menu_from_cache, store_menu_in_cache
 from core.config import settings
+from db.database import fetch_menu
+from cache.redis_cache import (
+    get_or_load_menu,
+    get_or_compute_recommendation,
+    recommendation_key,
+)
+from services.llm_clients import get_chat_model
+from services.menu_features import menu_features
 
 # === Configuration ===
 
+RECOMMENDATION_MODEL = "moonshotai/kimi-k2-instruct"
+
 # Meal-specific category lists for filtering
 MEAL_PRIORITY = {
     "breakfast": [
@@ -26,14 +35,63 @@ MEAL_PRIORITY = {
 
 
 # === Internal Question Wrapper ===
+def _norm(value) -> str:
+    return " ".join(str(value or "").lower().split())
+
 class InternalQuestion:
+    """
+    Preferences normalized once (lowercase, single spaces; dietary
+    restrictions de-duplicated and sorted), so the recommendation cache key
+    and the recommendation itself see the same values.
+    """
     def __init__(self, preferences):
         self.peoples = preferences.number_of_people
-        self.mood = preferences.craving_type
-        self.spice_lvl = preferences.spice_level
-        self.avoid_anything = preferences.dietary_restrictions or ""
-        self.budget = preferences.budget_level
-        self.meal_time = preferences.meal_type
+        self.mood = _norm(preferences.craving_type)
+        self.spice_lvl = _norm(preferences.spice_level)
+        self.avoid_anything = ", ".join(sorted({
+            _norm(part)
+            for part in str(preferences.dietary_restrictions or "").replace(";", ",").split(",")
+            if _norm(part)
+        }))
+        self.budget = _norm(preferences.budget_level)
+        self.meal_time = _norm(preferences.meal_type)
+
+
+# === Recommendation Cache Keys ===
+def preferences_hash(q: InternalQuestion) -> str:
+    """
+    Hash of the preference fields (already normalized by InternalQuestion).
+    """
+    normalized = [
+        int(q.peoples),
+        q.meal_time,
+        q.budget,
+        q.mood,
+        q.spice_lvl,
+        q.avoid_anything,
+    ]
+    raw = json.dumps(normalized, separators=(",", ":")).encode("utf-8")
+    return hashlib.blake2b(raw, digest_size=12).hexdigest()
+
+# Last menu list object seen per branch and its hash; menus served from the
+# L1 cache are the same object until the entry is replaced
+_menu_hashes: Dict[int, Tuple[List[Dict], str]] = {}
+
+def menu_hash(branch: int, menu: List[Dict]) -> str:
+    """
+    Content hash of a branch menu (the fields recommendations depend on).
+    """
+    cached = _menu_hashes.get(branch)
+    if cached is not None and cached[0] is menu:
+        return cached[1]
+    digest = hashlib.blake2b(digest_size=12)
+    for item in menu:
+        digest.update(
+            f"{item['name']}\x1f{item['category']}\x1f{item['price']}\x1f{item['serves']}\x1e".encode("utf-8")
+        )
+    value = digest.hexdigest()
+    _menu_hashes[branch] = (menu, value)
+    return value
 
 
 # === Helper Functions ===
@@ -77,25 +135,18 @@ def filter_items_by_meal_time(
     """
     Filter items based on meal time only.
     Returns items that match meal-specific categories.
+    If meal time is not recognized or no item matches, returns all items.
+    Uses the precomputed feature matrix of the menu (category mask).
     """
-    # Get category priority for meal time
     category_priority = MEAL_PRIORITY.get(meal_time)
-    
-    # If meal time is not recognized, return all items
     if not category_priority:
         return menu
-    
-    # Filter items by meal time categories
-    filtered_items = []
-    for item in menu:
-        if item["category"] in category_priority:
-            filtered_items.append(item)
-    
-    # If no items found in priority categories, return all items
-    if not filtered_items:
+
+    features = menu_features(menu)
+    mask = features.category_mask(category_priority)
+    if not mask.any():
         return menu
-    
-    return filtered_items
+    return features.select(mask)
 
 # === Convert Items to JSON Format ===
 def items_to_json(items: List[Dict]) -> str:
@@ -114,26 +165,9 @@ def items_to_json(items: List[Dict]) -> str:
     
     return json.dumps(json_items, indent=2)
 
-# === Get ChatGroq Recommendations ===
-async def get_groq_recommendations(
-    filtered_items_json: str,
-    preferences: InternalQuestion,
-    ideal_budget: int,
-    hard_budget: int
-) -> str:
-    """
-    Send filtered items and preferences to ChatGroq and get recommendations.
-    """
-    # Initialize ChatGroq
-    llm = ChatGroq(
-        groq_api_key=settings.GROQ_API_KEY,
-        model_name="moonshotai/kimi-k2-instruct",
-        temperature=0.7
-    )
-    
-    # Create prompt template
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", """You are a restaurant recommendation expert. Your task is to analyze menu items and user preferences to suggest meal deals.
+# === Recommendation Prompt (built once at import) ===
+RECOMMENDATION_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are a restaurant recommendation expert. Your task is to analyze menu items and user preferences to suggest meal deals.
 
 Given menu items filtered by meal time and user preferences, recommend 3 different meal deals that:
 1. Fit within the budget constraints (ideal: {ideal_budget} PKR, maximum: {hard_budget} PKR)
@@ -177,7 +211,7 @@ Be practical and consider:
 - User preferences (mood, spice, dietary restrictions)
 - Budget constraints
 - Meal time appropriateness"""),
-        ("human", """User Preferences:
+    ("human", """User Preferences:
 - Number of people: {peoples}
 - Meal time: {meal_time}
 - Mood/Craving: {mood}
@@ -191,10 +225,24 @@ Menu Items Filtered by Meal Time (JSON):
 {filtered_items}
 
 Please recommend 3 different meal deals based on the above information. Apply all filtering rules (mood, spice, dietary restrictions) and return only valid JSON."""),
-    ])
+])
+
+
+# === Get ChatGroq Recommendations ===
+async def get_groq_recommendations(
+    filtered_items_json: str,
+    preferences: InternalQuestion,
+    ideal_budget: int,
+    hard_budget: int
+) -> str:
+    """
+    Send filtered items and preferences to ChatGroq and get recommendations.
+    """
+    # Shared, pooled client (see services.llm_clients)
+    llm = get_chat_model(RECOMMENDATION_MODEL, temperature=0.7)
     
     # Format prompt
-    formatted_prompt = prompt.format_messages(
+    formatted_prompt = RECOMMENDATION_PROMPT.format_messages(
         peoples=preferences.peoples,
         meal_time=preferences.meal_time,
         mood=preferences.mood,
@@ -282,25 +330,51 @@ def build_deals_from_groq_response(
     except (json.JSONDecodeError, KeyError, Exception) as e:
         print(f"Error parsing Groq response: {e}")
         print(f"Response was: {groq_response}")
-        # Return empty list if Groq fails - no fallback
+        # Empty result: the caller falls back to the local deal optimizer
         return []
 
 # === Generate Recommendations ===
-async def generate_recommendation(branch: int, q: InternalQuestion):
+async def generate_recommendation(branch: int, q: InternalQuestion, mode: str = "llm"):
     """
     Main recommendation generation function.
     Uses ChatGroq for intelligent recommendations after meal time filtering.
+    mode="fast" (or an LLM failure / timeout / unusable reply) uses the local
+    deal optimizer instead.
     """
+    from services.deal_optimizer import optimize_deals
+
     _, ideal_budget, hard_budget = get_budget_range(
         q.peoples, q.budget, q.mood
     )
 
-    # Fetch menu from cache, fallback to DB
-    menu = await get_menu_from_cache(branch)
-    if not menu:
-        menu = await fetch_menu(branch)
-        await store_menu_in_cache(branch, menu)
+    # Fetch menu from L1 / Redis cache, fallback to DB (one load per branch at a time)
+    menu = await get_or_load_menu(branch, fetch_menu)
+
+    if mode == "fast":
+        return optimize_deals(menu, q, ideal_budget, hard_budget)
+
+    # Identical preferences against the same menu reuse the cached deals
+    key = recommendation_key(branch, menu_hash(branch, menu), preferences_hash(q))
+    try:
+        deals = await get_or_compute_recommendation(
+            key,
+            lambda: _generate_deals(menu, q, ideal_budget, hard_budget),
+        )
+    except Exception as e:
+        print(f"Groq recommendation error: {e!r}")
+        deals = []
+
+    # Fallback results are not cached so the next request retries the LLM
+    if not deals:
+        deals = optimize_deals(menu, q, ideal_budget, hard_budget)
+    return deals
 
+async def _generate_deals(
+    menu: List[Dict],
+    q: InternalQuestion,
+    ideal_budget: int,
+    hard_budget: int
+) -> List[Dict]:
     # === STEP 1: Manual filtering based on meal time only ===
     filtered_items = filter_items_by_meal_time(
         menu=menu,
@@ -310,12 +384,15 @@ async def generate_recommendation(branch: int, q: InternalQuestion):
     # === STEP 2: Convert filtered items to JSON ===
     filtered_items_json = items_to_json(filtered_items)
     
-    # === STEP 3: Get recommendations from ChatGroq ===
-    groq_response = await get_groq_recommendations(
-        filtered_items_json=filtered_items_json,
-        preferences=q,
-        ideal_budget=ideal_budget,
-        hard_budget=hard_budget
+    # === STEP 3: Get recommendations from ChatGroq (bounded wait) ===
+    groq_response = await asyncio.wait_for(
+        get_groq_recommendations(
+            filtered_items_json=filtered_items_json,
+            preferences=q,
+            ideal_budget=ideal_budget,
+            hard_budget=hard_budget
+        ),
+        timeout=settings.RECO_LLM_TIMEOUT,
     )
     
     # === STEP 4: Build final deals from ChatGroq response ===
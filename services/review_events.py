@@ -0,0 +1,149 @@
+import asyncio
+import json
+from typing import Any, Dict, List, NamedTuple, Optional, Set
+
+from cache.pubsub import broker_from_setting
+from core.config import settings
+
+
+class ReviewEvent(NamedTuple):
+    sentiment: str
+    cursor: str
+    message: Dict[str, Any]
+    # The message JSON, encoded once per worker and shared by every subscriber
+    encoded: str
+
+
+# === Per-Client Subscription ===
+class Subscription:
+    """
+    Bounded queue of events for one client. A client that falls
+    `queue_size` events behind is dropped (`overflowed`) instead of buffering
+    without limit; it can resume from its last cursor.
+    """
+
+    def __init__(self, sentiment: str, queue_size: int):
+        self.sentiment = sentiment
+        self.overflowed = False
+        self.closed = False
+        self._queue: "asyncio.Queue[Optional[ReviewEvent]]" = asyncio.Queue(queue_size + 1)
+        self._limit = queue_size
+
+    def offer(self, event: ReviewEvent) -> bool:
+        if self.closed:
+            return False
+        if self._queue.qsize() >= self._limit:
+            self.overflowed = True
+            self.close()
+            return False
+        self._queue.put_nowait(event)
+        return True
+
+    def close(self):
+        """
+        Wake the reader; next_batch returns an empty list from now on.
+        """
+        if not self.closed:
+            self.closed = True
+            self._queue.put_nowait(None)
+
+    async def next_batch(self, limit: int) -> List[ReviewEvent]:
+        """
+        Wait for the next event, then take up to `limit` already queued ones.
+        Empty once the subscription is closed.
+        """
+        if self.closed and self._queue.empty():
+            return []
+        event = await self._queue.get()
+        batch = []
+        while event is not None:
+            batch.append(event)
+            if len(batch) >= limit or self._queue.empty():
+                return batch
+            event = self._queue.get_nowait()
+        return batch
+
+
+# === Worker-Wide Fan-Out ===
+class ReviewEventHub:
+    """
+    One broker subscription per worker, fanned out to local websocket clients.
+
+    Events are decoded once and handed only to the subscriptions registered
+    for their sentiment, so per-client cost is a queue put, not a broker
+    connection or a filter over every event.
+    """
+
+    def __init__(self, broker, channel: str, queue_size: int):
+        self.broker = broker
+        self.channel = channel
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            # Let the listener register before the first publish
+            await asyncio.sleep(0)
+
+    async def aclose(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        for group in self._subscribers.values():
+            for subscription in group:
+                subscription.close()
+        self._subscribers.clear()
+
+    async def subscribe(self, sentiment: str) -> Subscription:
+        await self.start()
+        subscription = Subscription(sentiment, self.queue_size)
+        self._subscribers.setdefault(sentiment, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscription.close()
+        group = self._subscribers.get(subscription.sentiment)
+        if group is not None:
+            group.discard(subscription)
+
+    def subscriber_count(self) -> int:
+        return sum(len(group) for group in self._subscribers.values())
+
+    async def publish(self, message: Dict[str, Any], cursor: str) -> int:
+        payload = json.dumps({"cursor": cursor, "message": message})
+        return await self.broker.publish(self.channel, payload.encode())
+
+    def dispatch(self, data: bytes):
+        """
+        Deliver one broker payload to the subscriptions of its sentiment.
+        """
+        envelope = json.loads(data)
+        message = envelope["message"]
+        sentiment = (message.get("review") or {}).get("sentiment")
+        group = self._subscribers.get(sentiment)
+        if not group:
+            return
+        event = ReviewEvent(sentiment, envelope["cursor"], message, json.dumps(message))
+        for subscription in list(group):
+            if not subscription.offer(event):
+                group.discard(subscription)
+
+    async def _run(self):
+        async for data in self.broker.listen(self.channel):
+            try:
+                self.dispatch(data)
+            except Exception as e:
+                print(f"Review event dispatch error: {e}")
+
+
+review_events = ReviewEventHub(
+    broker_from_setting(settings.REVIEWS_BROKER),
+    settings.REVIEWS_CHANNEL,
+    settings.REVIEWS_LIVE_QUEUE_SIZE,
+)
@@ -1,68 +1,330 @@
-from typing import Dict, Literal, Any
+from typing import Dict, Iterable, Iterator, List, Literal, Any, Optional, Tuple
+from bisect import bisect_right
+from itertools import islice
 import re
 
-# === Sentiment Analysis Service ===
+# === Sentiment Keyword Patterns (matched as whole words) ===
+POSITIVE_PATTERNS = [
+    r'excellent|amazing|great|wonderful|fantastic|delicious|love|perfect|best|awesome|outstanding|superb|tasty|yummy|satisfied|happy|pleased|recommend|highly|very good|really good',
+    r'(?:5|five)\s*(?:star|stars)',
+    r'10/10|9/10|8/10',
+]
 
-def analyze_sentiment(review: str) -> Dict[str, Any]:
+NEGATIVE_PATTERNS = [
+    r'terrible|awful|horrible|bad|worst|disgusting|hate|disappointed|poor|unacceptable|inedible|waste|regret|never again|avoid|nasty|sick',
+    r'(?:1|one)\s*(?:star|stars)',
+    r'0/10|1/10|2/10',
+]
+
+NEUTRAL_RESULT = {"sentiment": "neutral", "star_rating": 3}
+
+
+# === Sentiment Analysis Service ===
+class SentimentEngine:
     """
-    Analyze sentiment of a review text.
-    Returns sentiment (positive, negative, neutral) and star_rating (1-5).
-    
-    Args:
-        review: Review text to analyze
-        
-    Returns:
-        Dictionary with 'sentiment' and 'star_rating' keys
+    Keyword sentiment scorer.
+
+    All positive and negative patterns are compiled once into a single
+    alternation with one named group per polarity, so a review is lowercased
+    once and scanned once; each match is counted for the group that matched.
+    The word-boundary checks are hoisted out of the alternation, so the
+    alternatives are only tried at the start of a word.
     """
-    if not review or not review.strip():
-        return {"sentiment": "neutral", "star_rating": 3}
-    
-    review_lower = review.lower().strip()
-    
-    # Positive keywords and phrases
-    positive_patterns = [
-        r'\b(excellent|amazing|great|wonderful|fantastic|delicious|love|perfect|best|awesome|outstanding|superb|tasty|yummy|satisfied|happy|pleased|recommend|highly|very good|really good)\b',
-        r'\b(5|five)\s*(star|stars)\b',
-        r'\b(10/10|9/10|8/10)\b',
-    ]
-    
-    # Negative keywords and phrases
-    negative_patterns = [
-        r'\b(terrible|awful|horrible|bad|worst|disgusting|hate|disappointed|poor|unacceptable|inedible|waste|regret|never again|avoid|disgusting|nasty|sick)\b',
-        r'\b(1|one)\s*(star|stars)\b',
-        r'\b(0/10|1/10|2/10)\b',
-    ]
-    
-    # Count positive and negative matches
-    positive_count = sum(len(re.findall(pattern, review_lower)) for pattern in positive_patterns)
-    negative_count = sum(len(re.findall(pattern, review_lower)) for pattern in negative_patterns)
-    
+
+    def __init__(self, positive: List[str], negative: List[str]):
+        self._pattern = re.compile(
+            r"\b(?=\w)(?:(?P<pos>" + "|".join(f"(?:{p})" for p in positive)
+            + ")|(?P<neg>" + "|".join(f"(?:{p})" for p in negative) + r"))\b"
+        )
+
+    def counts(self, review: str) -> Tuple[int, int]:
+        """
+        (positive, negative) keyword hits in the review.
+        """
+        positive = negative = 0
+        for match in self._pattern.finditer(review.lower()):
+            if match.lastgroup == "pos":
+                positive += 1
+            else:
+                negative += 1
+        return positive, negative
+
+    def analyze(self, review: str) -> Dict[str, Any]:
+        if not review or not review.strip():
+            return dict(NEUTRAL_RESULT)
+        return _rating(*self.counts(review))
+
+    def analyze_many(self, reviews: Iterable[str]) -> List[Dict[str, Any]]:
+        """
+        Analyze a batch of reviews; repeated texts are scored once.
+        """
+        seen: Dict[str, Dict[str, Any]] = {}
+        results = []
+        for review in reviews:
+            result = seen.get(review)
+            if result is None:
+                result = seen[review] = self.analyze(review)
+            results.append(dict(result))
+        return results
+
+
+def _rating(positive_count: int, negative_count: int) -> Dict[str, Any]:
     # Determine sentiment
     if positive_count > negative_count:
         sentiment = "positive"
         # Map to star rating: more positive matches = higher rating
-        if positive_count >= 3:
-            star_rating = 5
-        elif positive_count >= 2:
-            star_rating = 4
-        else:
-            star_rating = 4
+        star_rating = 5 if positive_count >= 3 else 4
     elif negative_count > positive_count:
         sentiment = "negative"
         # Map to star rating: more negative matches = lower rating
-        if negative_count >= 3:
-            star_rating = 1
-        elif negative_count >= 2:
-            star_rating = 2
-        else:
-            star_rating = 2
+        star_rating = 1 if negative_count >= 3 else 2
     else:
         # Neutral or balanced
         sentiment = "neutral"
         star_rating = 3
-    
+
     return {
         "sentiment": sentiment,
         "star_rating": star_rating
     }
 
+
+sentiment_engine = SentimentEngine(POSITIVE_PATTERNS, NEGATIVE_PATTERNS)
+
+
+def analyze_sentiment(review: str) -> Dict[str, Any]:
+    """
+    Analyze sentiment of a review text.
+    Returns sentiment (positive, negative, neutral) and star_rating (1-5).
+    
+    Args:
+        review: Review text to analyze
+        
+    Returns:
+        Dictionary with 'sentiment' and 'star_rating' keys
+    """
+    return sentiment_engine.analyze(review)
+
+
+def analyze_many(reviews: Iterable[str]) -> List[Dict[str, Any]]:
+    """
+    Batch analyze_sentiment: one result per review, in order.
+    """
+    return sentiment_engine.analyze_many(reviews)
+
+
+# === Persisted Sentiment Annotations ===
+def annotate_sentiments(menu: List[Dict[str, Any]]) -> int:
+    """
+    Store "sentiment" and "star_rating" on every review of a reviews menu that
+    does not have them yet (in place, so they are cached with the menu).
+    Returns the number of reviews analyzed.
+    """
+    pending = [
+        review
+        for item in menu
+        for review in item.get("reviews") or []
+        if "sentiment" not in review
+    ]
+    results = analyze_many(review.get("review", "") for review in pending)
+    for review, result in zip(pending, results):
+        review.update(result)
+    return len(pending)
+
+
+# === Per-Sentiment Review Index ===
+ReviewRef = Tuple[Dict[str, Any], Dict[str, Any]]  # (menu item, review)
+
+
+def review_cursor(review: Dict[str, Any]) -> str:
+    """
+    Resume position for a streamed review: its id. Review ids are assigned in
+    increasing order, so "after this cursor" covers every review added later,
+    whichever item it belongs to.
+    """
+    return str(review.get("id"))
+
+
+def parse_cursor(cursor: Any) -> Optional[int]:
+    """
+    Review id of a cursor (None for no cursor). Cursors from before ids were
+    used ("item_id:review_id") resolve to their review id.
+    Raises ValueError for anything else.
+    """
+    if cursor is None or cursor == "":
+        return None
+    if isinstance(cursor, int) and not isinstance(cursor, bool):
+        return cursor
+    if isinstance(cursor, str):
+        return int(cursor.rpartition(":")[2])
+    raise ValueError(f"invalid cursor: {cursor!r}")
+
+
+def _review_id(ref: "ReviewRef") -> int:
+    return ref[1].get("id") or 0
+
+
+class SentimentIndex:
+    """
+    Reviews grouped by sentiment, in review id order, for one version of the reviews menu.
+    """
+
+    def __init__(self, menu: List[Dict[str, Any]], etag: Optional[str] = None):
+        self.menu = menu
+        self.etag = etag
+        self._refs: Dict[str, List[ReviewRef]] = {"positive": [], "negative": [], "neutral": []}
+        for item in menu:
+            for review in item.get("reviews") or []:
+                if review.get("review") and review.get("sentiment") in self._refs:
+                    self._refs[review["sentiment"]].append((item, review))
+        self._ids: Dict[str, List[int]] = {}
+        for sentiment, refs in self._refs.items():
+            refs.sort(key=_review_id)
+            self._ids[sentiment] = [_review_id(ref) for ref in refs]
+
+    def lookup(self, sentiment: str) -> List[ReviewRef]:
+        return self._refs.get(sentiment, [])
+
+    def iter_after(self, sentiment: str, after_id: Optional[int] = None) -> Iterator[ReviewRef]:
+        """
+        Reviews of a sentiment with an id greater than `after_id` (all if None), in id order.
+        """
+        start = 0 if after_id is None else bisect_right(self._ids.get(sentiment, []), after_id)
+        return islice(self.lookup(sentiment), start, None)
+
+    def contains(self, sentiment: str, review_id: int) -> bool:
+        ids = self._ids.get(sentiment, [])
+        position = bisect_right(ids, review_id) - 1
+        return position >= 0 and ids[position] == review_id
+
+    def review_ids(self, sentiment: str) -> List[Any]:
+        return [review.get("id") for _, review in self.lookup(sentiment)]
+
+    def counts(self) -> Dict[str, int]:
+        return {sentiment: len(refs) for sentiment, refs in self._refs.items()}
+
+
+_sentiment_index: Optional[SentimentIndex] = None
+
+
+def get_sentiment_index(menu: List[Dict[str, Any]], etag: Optional[str] = None) -> SentimentIndex:
+    """
+    Index for `menu`, keyed on the content hash stored with the cached menu
+    (cache.redis_cache.store_reviews_menu_in_cache): the same version decoded
+    again from Redis reuses the index without scanning it, and any content
+    change, including an edited review, rebuilds it. Without a hash the index
+    is only reused for the same menu object.
+    Reviews missing annotations (e.g. cached before they existed) are analyzed once.
+    """
+    global _sentiment_index
+    index = _sentiment_index
+    if index is not None and (index.menu is menu or (etag is not None and index.etag == etag)):
+        return index
+
+    annotate_sentiments(menu)
+    index = _sentiment_index = SentimentIndex(menu, etag)
+    return index
+
+
+# === Reviews Menu Queries (filter, project, paginate) ===
+def filter_reviews_menu(
+    menu: List[Dict[str, Any]],
+    category: Optional[str] = None,
+    item_id: Optional[int] = None,
+    sentiment: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    min_stars: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Items matching the item filters, each with only the reviews matching the
+    review filters (ISO dates, inclusive). With any review filter set, items
+    left without reviews are dropped. The menu itself is not modified.
+    """
+    review_filtered = any(f is not None for f in (sentiment, date_from, date_to, min_stars))
+    category = category.lower() if category else None
+    items = []
+    for item in menu:
+        if item_id is not None and item.get("id") != item_id:
+            continue
+        if category is not None and (item.get("category") or "").lower() != category:
+            continue
+        if not review_filtered:
+            items.append(item)
+            continue
+        reviews = [
+            review
+            for review in item.get("reviews") or []
+            if (sentiment is None or review.get("sentiment") == sentiment)
+            and (min_stars is None or (review.get("star_rating") or 0) >= min_stars)
+            and (date_from is None or (review.get("date") or "") >= date_from)
+            and (date_to is None or (review.get("date") or "") <= date_to)
+        ]
+        if reviews:
+            items.append(dict(item, reviews=reviews))
+    return items
+
+
+def paginate_items(
+    items: List[Dict[str, Any]],
+    cursor: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """
+    Page of items in id order starting at the first id greater than `cursor`,
+    and the cursor of the next page (None on the last page). Seeking by id
+    keeps paging correct when the cursor item itself is no longer listed
+    (removed, or filtered out since the previous page).
+    """
+    if cursor is None and limit is None:
+        return items, None
+    items = sorted(items, key=lambda item: item.get("id") or 0)
+    start = 0
+    if cursor is not None:
+        start = bisect_right([item.get("id") or 0 for item in items], cursor)
+    if limit is None:
+        return items[start:], None
+    page = items[start:start + limit]
+    more = start + limit < len(items)
+    return page, page[-1].get("id") if more and page else None
+
+
+def parse_fields(fields: Optional[str]) -> Tuple[Optional[Tuple[str, ...]], Optional[Tuple[str, ...]]]:
+    """
+    "id,name,reviews.review" -> (item fields, review fields); None keeps all fields.
+    Naming a review field implies "reviews".
+    """
+    if not fields:
+        return None, None
+    item_fields, review_fields = [], []
+    for name in (f.strip() for f in fields.split(",")):
+        if name.startswith("reviews."):
+            review_fields.append(name[len("reviews."):])
+        elif name:
+            item_fields.append(name)
+    if review_fields and item_fields and "reviews" not in item_fields:
+        item_fields.append("reviews")
+    return (
+        tuple(sorted(set(item_fields))) or None,
+        tuple(sorted(set(review_fields))) or None,
+    )
+
+
+def project_items(
+    items: List[Dict[str, Any]],
+    item_fields: Optional[Tuple[str, ...]] = None,
+    review_fields: Optional[Tuple[str, ...]] = None,
+) -> List[Dict[str, Any]]:
+    if item_fields is None and review_fields is None:
+        return items
+    projected = []
+    for item in items:
+        keys = item_fields if item_fields is not None else tuple(item)
+        out = {key: item[key] for key in keys if key in item}
+        if review_fields is not None and "reviews" in out:
+            out["reviews"] = [
+                {key: review[key] for key in review_fields if key in review}
+                for review in out["reviews"] or []
+            ]
+        projected.append(out)
+    return projected
@@ -0,0 +1,104 @@
+import threading
+import time
+from typing import Any, Dict, Hashable, List, Optional, Sequence
+
+import numpy as np
+
+
+# === Semantic Answer Cache ===
+class SemanticCache:
+    """
+    Caches chatbot answers keyed on question embeddings.
+
+    A lookup returns a stored answer when the cosine similarity between the new
+    question and a cached one is at least `threshold`. Entries expire after
+    `ttl` seconds; when full, an expired or else the least recently used slot
+    is overwritten. Everything is dropped when the index version changes
+    (the vector store was rebuilt, so cached answers may be stale).
+    An optional `scope` (e.g. the branch id) partitions entries: a lookup only
+    matches answers stored under the same scope.
+    """
+
+    def __init__(self, threshold: float, ttl: float, max_items: int):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_items = max_items
+        self._lock = threading.Lock()
+        self._version: Any = None
+        self._reset(dim=0)
+
+    def _reset(self, dim: int):
+        self._vectors = np.zeros((self.max_items, dim), dtype=np.float32)
+        self._expires = np.zeros(self.max_items, dtype=np.float64)
+        self._last_used = np.zeros(self.max_items, dtype=np.float64)
+        self._answers: List[Optional[str]] = [None] * self.max_items
+        self._scopes = np.zeros(self.max_items, dtype=np.int64)
+        self._scope_codes: Dict[Hashable, int] = {}
+        self._size = 0
+
+    def _scope_code(self, scope: Hashable) -> int:
+        return self._scope_codes.setdefault(scope, len(self._scope_codes))
+
+    def __len__(self) -> int:
+        now = time.monotonic()
+        return int((self._expires[:self._size] > now).sum())
+
+    @staticmethod
+    def _normalize(vector: Sequence[float]) -> np.ndarray:
+        v = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(v))
+        return v / norm if norm else v
+
+    def ensure_version(self, version: Any):
+        """
+        Clear the cache if the underlying index version changed.
+        """
+        with self._lock:
+            if version != self._version:
+                if self._size:
+                    print("Semantic cache cleared: vector index changed")
+                self._version = version
+                self._reset(dim=self._vectors.shape[1])
+
+    def clear(self):
+        with self._lock:
+            self._reset(dim=self._vectors.shape[1])
+
+    def lookup(self, vector: Sequence[float], scope: Hashable = None) -> Optional[str]:
+        if self.max_items <= 0 or self.ttl <= 0:
+            return None
+        query = self._normalize(vector)
+        with self._lock:
+            if self._size == 0 or self._vectors.shape[1] != query.shape[0]:
+                return None
+            now = time.monotonic()
+            scores = self._vectors[:self._size] @ query
+            scores[self._expires[:self._size] <= now] = -np.inf
+            scores[self._scopes[:self._size] != self._scope_code(scope)] = -np.inf
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                return None
+            self._last_used[best] = now
+            return self._answers[best]
+
+    def store(self, vector: Sequence[float], answer: str, scope: Hashable = None):
+        if self.max_items <= 0 or self.ttl <= 0 or not answer:
+            return
+        entry = self._normalize(vector)
+        with self._lock:
+            if self._vectors.shape[1] != entry.shape[0]:
+                self._reset(dim=entry.shape[0])
+
+            now = time.monotonic()
+            if self._size < self.max_items:
+                slot = self._size
+                self._size += 1
+            else:
+                expired = np.flatnonzero(self._expires <= now)
+                slot = int(expired[0]) if expired.size else int(np.argmin(self._last_used))
+
+            self._vectors[slot] = entry
+            self._expires[slot] = now + self.ttl
+            self._last_used[slot] = now
+            self._answers[slot] = answer
+            self._scopes[slot] = self._scope_code(scope)
@@ -0,0 +1,498 @@
+"""
+Offline build pipeline for the chatbot FAISS index.
+
+Builds documents from data/menu.csv, the reviews in
+db.database.fetch_menu_with_reviews and FAQ files (data/faq/*.md|*.txt),
+embeds only new or changed documents in batches, removes deleted ones, and
+publishes the result as a new version directory that serving workers pick up
+without a restart:
+
+    vector_db/
+        CURRENT                     name of the active version (atomically replaced)
+        versions/<version>/         index.faiss, index.pkl, manifest.json
+                                    index_<type>.faiss/.pkl for each compressed variant
+        index.faiss, index.pkl      legacy artifacts, used while CURRENT does not exist
+
+The flat index is the source of truth for incremental updates. Compressed
+serving variants (IVF, IVF-PQ, IVF-SQ8, SQ8) are derived from its vectors on
+every build, so they never need re-embedding; workers choose one with
+VECTOR_INDEX_TYPE and tune IVF search breadth with VECTOR_INDEX_NPROBE.
+
+Usage:
+    python -m services.vector_index build [--faq-dir data/faq] [--batch-size 64] [--force]
+                                          [--index-type ivfpq ...] [--nlist N] [--pq-m 48]
+"""
+import argparse
+import asyncio
+import glob
+import hashlib
+import json
+import os
+import math
+import shutil
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from db.database import BASE_DIR, menu_store, fetch_menu_with_reviews
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+VECTOR_DB_DIR = os.path.join(BASE_DIR, "vector_db")
+FAQ_DIR = os.path.join(BASE_DIR, "data", "faq")
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+MANIFEST_FILE = "manifest.json"
+
+# Flat (exact) index plus compressed serving variants
+INDEX_TYPES = ("flat", "ivf", "ivfpq", "ivfsq", "sq8")
+DEFAULT_PQ_M = 48  # sub-quantizers; must divide the embedding dimension (384)
+DEFAULT_PQ_NBITS = 8
+
+# (doc_id, text, metadata)
+SourceDocument = Tuple[str, str, Dict[str, Any]]
+
+
+# === Source Documents ===
+def menu_documents() -> List[SourceDocument]:
+    documents = []
+    for branch in menu_store.branches():
+        for item in menu_store.fetch(branch):
+            text = (
+                f"{item['name']} ({item['category']}, {item['portion']}) at branch {branch}: "
+                f"price {item['price']} PKR, serves {item['serves']}."
+            )
+            documents.append((
+                f"menu:{item['id']}",
+                text,
+                {
+                    "source": "menu",
+                    "branch": branch,
+                    "item_id": item["id"],
+                    "category": item["category"],
+                },
+            ))
+    return documents
+
+
+def review_documents() -> List[SourceDocument]:
+    documents = []
+    for item in asyncio.run(fetch_menu_with_reviews()):
+        for review in item.get("reviews") or []:
+            if not review.get("review"):
+                continue
+            text = (
+                f"Review of {item['name']} ({item['category']}) by {review.get('customer_name')} "
+                f"on {review.get('date')}: {review['review']}"
+            )
+            documents.append((
+                f"review:{review['id']}",
+                text,
+                {
+                    "source": "reviews",
+                    # The reviews source has no branch: None makes reviews shared
+                    # across branches (like FAQs) in BranchSearcher
+                    "branch": item.get("branch"),
+                    "item_id": item["id"],
+                    "category": item["category"],
+                },
+            ))
+    return documents
+
+
+def faq_documents(faq_dir: str) -> List[SourceDocument]:
+    """
+    One document per blank-line separated paragraph of every FAQ file.
+    """
+    documents = []
+    paths = sorted(glob.glob(os.path.join(faq_dir, "*.md")) + glob.glob(os.path.join(faq_dir, "*.txt")))
+    for path in paths:
+        with open(path, mode='r', encoding='utf-8') as f:
+            paragraphs = [p.strip() for p in f.read().split("\n\n") if p.strip()]
+        name = os.path.basename(path)
+        for n, paragraph in enumerate(paragraphs):
+            documents.append((f"faq:{name}#{n}", paragraph, {"source": "faq", "branch": None}))
+    return documents
+
+
+def collect_documents(faq_dir: str) -> List[SourceDocument]:
+    return menu_documents() + review_documents() + faq_documents(faq_dir)
+
+
+def document_hash(text: str, metadata: Dict[str, Any]) -> str:
+    payload = json.dumps([text, metadata], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# === Versioned Layout ===
+def current_version(base_dir: str = VECTOR_DB_DIR) -> Optional[str]:
+    try:
+        with open(os.path.join(base_dir, CURRENT_FILE), mode='r', encoding='utf-8') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def resolve_index_dir(base_dir: str = VECTOR_DB_DIR) -> str:
+    """
+    Directory of the active index: the CURRENT version, or the legacy flat layout.
+    """
+    version = current_version(base_dir)
+    if version:
+        return os.path.join(base_dir, VERSIONS_DIR, version)
+    return base_dir
+
+
+def read_manifest(index_dir: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(index_dir, MANIFEST_FILE), mode='r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def publish_version(base_dir: str, version: str):
+    """
+    Atomically point CURRENT at `version` (write temp file + rename).
+    """
+    tmp_path = os.path.join(base_dir, f"{CURRENT_FILE}.tmp")
+    with open(tmp_path, mode='w', encoding='utf-8') as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(base_dir, CURRENT_FILE))
+
+
+def prune_versions(base_dir: str, keep: int):
+    versions_dir = os.path.join(base_dir, VERSIONS_DIR)
+    active = current_version(base_dir)
+    versions = sorted(os.listdir(versions_dir)) if os.path.isdir(versions_dir) else []
+    for version in versions[:-keep] if keep > 0 else []:
+        if version != active:
+            shutil.rmtree(os.path.join(versions_dir, version), ignore_errors=True)
+
+
+# === Loading ===
+def load_embeddings():
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+
+
+def index_name(index_type: str) -> str:
+    return "index" if index_type == "flat" else f"index_{index_type}"
+
+
+def load_vectorstore(
+    embeddings,
+    base_dir: str = VECTOR_DB_DIR,
+    index_type: str = "flat",
+    nprobe: Optional[int] = None,
+):
+    """
+    Load the active index. Non-flat `index_type`s fall back to the flat index
+    when that variant was not built for the active version.
+    """
+    import faiss
+    from langchain_community.vectorstores import FAISS
+
+    index_dir = resolve_index_dir(base_dir)
+    if index_type != "flat" and not os.path.exists(os.path.join(index_dir, f"{index_name(index_type)}.faiss")):
+        print(f"Vector index variant '{index_type}' not built in {index_dir}, using flat")
+        index_type = "flat"
+
+    store = FAISS.load_local(
+        index_dir,
+        embeddings,
+        index_name=index_name(index_type),
+        allow_dangerous_deserialization=True
+    )
+    if nprobe and index_type in ("ivf", "ivfpq", "ivfsq"):
+        faiss.extract_index_ivf(store.index).nprobe = nprobe
+    return store
+
+
+# === Branch-Filtered Search ===
+class BranchSearcher:
+    """
+    Similarity search restricted to one branch.
+
+    Built once per loaded store: documents are grouped by their "branch"
+    metadata and each branch gets a FAISS ID selector over its own documents
+    plus the branch-less ones (reviews without a branch, FAQs). The selector is
+    applied inside the index search, so k results always come from the
+    branch instead of over-fetching and post-filtering. Indexes without branch
+    metadata (e.g. the legacy artifacts) are searched unfiltered.
+    """
+
+    def __init__(self, store):
+        import faiss
+        import numpy as np
+
+        self.store = store
+        by_branch: Dict[Any, List[int]] = {}
+        shared: List[int] = []
+        for position, doc_id in store.index_to_docstore_id.items():
+            doc = store.docstore.search(doc_id)
+            branch = getattr(doc, "metadata", {}).get("branch")
+            if branch is None:
+                shared.append(position)
+            else:
+                by_branch.setdefault(branch, []).append(position)
+
+        # Keep the id arrays referenced: FAISS selectors do not own them
+        self._ids = {
+            branch: np.array(sorted(ids + shared), dtype=np.int64)
+            for branch, ids in by_branch.items()
+        }
+        self._ids[None] = np.array(sorted(shared), dtype=np.int64)
+        self._selectors = {
+            branch: faiss.IDSelectorBatch(ids.size, faiss.swig_ptr(ids))
+            for branch, ids in self._ids.items()
+        }
+        self.filtered = bool(by_branch)
+        try:
+            self._ivf = faiss.extract_index_ivf(store.index)
+        except RuntimeError:
+            self._ivf = None
+
+    @property
+    def branches(self) -> List[Any]:
+        return [branch for branch in self._ids if branch is not None]
+
+    def search(self, vector: Sequence[float], k: int, branch: Optional[int] = None):
+        import faiss
+        import numpy as np
+
+        if branch is None or not self.filtered:
+            return self.store.similarity_search_by_vector(list(vector), k)
+
+        # Unknown branch: only branch-less documents apply
+        selector = self._selectors.get(branch, self._selectors[None])
+        if self._ivf is not None:
+            params = faiss.SearchParametersIVF(sel=selector, nprobe=self._ivf.nprobe)
+        else:
+            params = faiss.SearchParameters(sel=selector)
+
+        query = np.asarray([vector], dtype=np.float32)
+        _, positions = self.store.index.search(query, k, params=params)
+        return [
+            self.store.docstore.search(self.store.index_to_docstore_id[position])
+            for position in positions[0]
+            if position != -1
+        ]
+
+
+def default_nlist(count: int) -> int:
+    """
+    ~4*sqrt(n) inverted lists, capped so each list gets >= 39 training points.
+    """
+    return max(1, min(int(4 * math.sqrt(count)), count // 39))
+
+
+def build_faiss_index(
+    index_type: str,
+    vectors,
+    nlist: Optional[int] = None,
+    pq_m: int = DEFAULT_PQ_M,
+    pq_nbits: int = DEFAULT_PQ_NBITS,
+):
+    """
+    Build and train a FAISS index of `index_type` (L2, like the flat index)
+    over `vectors`, keeping row order so ids match the flat index.
+    """
+    import faiss
+    import numpy as np
+
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    count, dim = vectors.shape
+    nlist = min(nlist or default_nlist(count), max(1, count))
+
+    if index_type == "flat":
+        index = faiss.IndexFlatL2(dim)
+    elif index_type == "sq8":
+        index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit)
+    elif index_type == "ivf":
+        index = faiss.IndexIVFFlat(faiss.IndexFlatL2(dim), dim, nlist)
+    elif index_type == "ivfsq":
+        index = faiss.IndexIVFScalarQuantizer(
+            faiss.IndexFlatL2(dim), dim, nlist, faiss.ScalarQuantizer.QT_8bit
+        )
+    elif index_type == "ivfpq":
+        if dim % pq_m:
+            raise ValueError(f"pq_m={pq_m} must divide the embedding dimension {dim}")
+        # Each of the 2**nbits PQ centroids needs ~39 training points
+        nbits = max(1, min(pq_nbits, int(math.log2(max(2, count // 39)))))
+        index = faiss.IndexIVFPQ(faiss.IndexFlatL2(dim), dim, nlist, pq_m, nbits)
+    else:
+        raise ValueError(f"Unknown index type '{index_type}', expected one of {INDEX_TYPES}")
+
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    return index
+
+
+def save_variants(
+    store,
+    index_dir: str,
+    index_types: Sequence[str],
+    nlist: Optional[int] = None,
+    pq_m: int = DEFAULT_PQ_M,
+    pq_nbits: int = DEFAULT_PQ_NBITS,
+) -> List[str]:
+    """
+    Derive compressed variants from the flat store's vectors and save each
+    next to it with the same docstore and id mapping.
+    """
+    from langchain_community.vectorstores import FAISS
+
+    built = []
+    if store.index.ntotal == 0:
+        return built
+    vectors = store.index.reconstruct_n(0, store.index.ntotal)
+    for index_type in index_types:
+        if index_type == "flat":
+            continue
+        variant = FAISS(
+            embedding_function=store.embedding_function,
+            index=build_faiss_index(index_type, vectors, nlist, pq_m, pq_nbits),
+            docstore=store.docstore,
+            index_to_docstore_id=store.index_to_docstore_id,
+        )
+        variant.save_local(index_dir, index_name=index_name(index_type))
+        built.append(index_type)
+    return built
+
+
+def _empty_vectorstore(embeddings, dim: int):
+    import faiss
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+
+    return FAISS(
+        embedding_function=embeddings,
+        index=faiss.IndexFlatL2(dim),
+        docstore=InMemoryDocstore(),
+        index_to_docstore_id={},
+    )
+
+
+# === Build ===
+def build_index(
+    base_dir: str = VECTOR_DB_DIR,
+    faq_dir: str = FAQ_DIR,
+    batch_size: int = 64,
+    force: bool = False,
+    keep: int = 3,
+    embeddings=None,
+    index_types: Optional[Sequence[str]] = None,
+    nlist: Optional[int] = None,
+    pq_m: int = DEFAULT_PQ_M,
+    pq_nbits: int = DEFAULT_PQ_NBITS,
+) -> Optional[str]:
+    """
+    Incrementally rebuild the index and publish it as a new version.
+    Returns the new version name, or None when nothing changed.
+    `index_types` defaults to the variants of the current version, so they
+    carry forward unless changed explicitly (["flat"] drops them).
+    """
+    documents = collect_documents(faq_dir)
+    wanted = {doc_id: document_hash(text, metadata) for doc_id, text, metadata in documents}
+
+    previous_dir = resolve_index_dir(base_dir)
+    manifest = read_manifest(previous_dir)
+    if index_types is None:
+        index_types = manifest.get("variants", []) if manifest else []
+    if manifest is not None and manifest.get("embedding_model") != EMBEDDING_MODEL:
+        manifest = None
+    previous: Dict[str, str] = manifest["documents"] if manifest else {}
+
+    removed = [doc_id for doc_id in previous if doc_id not in wanted]
+    upserts = [doc for doc in documents if previous.get(doc[0]) != wanted[doc[0]]]
+    variants_missing = set(index_types) - {"flat"} - set(manifest.get("variants", []) if manifest else [])
+    if not force and manifest is not None and not removed and not upserts and not variants_missing:
+        print(f"Index up to date ({len(wanted)} documents)")
+        return None
+
+    embeddings = embeddings or load_embeddings()
+    if manifest is not None and not force:
+        store = load_vectorstore(embeddings, base_dir)
+        stale = removed + [doc_id for doc_id, _, _ in upserts if doc_id in previous]
+        if stale:
+            store.delete(stale)
+    else:
+        # No reusable manifest (legacy artifacts or --force): embed everything
+        upserts = documents
+        store = _empty_vectorstore(embeddings, len(embeddings.embed_query("dimension probe")))
+
+    started = time.monotonic()
+    for start in range(0, len(upserts), batch_size):
+        batch = upserts[start:start + batch_size]
+        texts = [text for _, text, _ in batch]
+        vectors = embeddings.embed_documents(texts)
+        store.add_embeddings(
+            list(zip(texts, vectors)),
+            metadatas=[metadata for _, _, metadata in batch],
+            ids=[doc_id for doc_id, _, _ in batch],
+        )
+    print(
+        f"Embedded {len(upserts)} document(s), removed {len(removed)} "
+        f"in {time.monotonic() - started:.1f}s"
+    )
+
+    digest = hashlib.sha256(json.dumps(wanted, sort_keys=True).encode("utf-8")).hexdigest()[:10]
+    version = f"{time.strftime('%Y%m%d%H%M%S')}-{digest}"
+    version_dir = os.path.join(base_dir, VERSIONS_DIR, version)
+    store.save_local(version_dir)
+    variants = save_variants(store, version_dir, index_types, nlist, pq_m, pq_nbits)
+    with open(os.path.join(version_dir, MANIFEST_FILE), mode='w', encoding='utf-8') as f:
+        json.dump({
+            "version": version,
+            "embedding_model": EMBEDDING_MODEL,
+            "variants": variants,
+            "documents": wanted,
+        }, f, indent=2, sort_keys=True)
+
+    publish_version(base_dir, version)
+    prune_versions(base_dir, keep)
+    print(f"Published index version {version} ({len(wanted)} documents)")
+    return version
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the chatbot FAISS index")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="incrementally rebuild and publish the index")
+    build.add_argument("--vector-db", default=VECTOR_DB_DIR)
+    build.add_argument("--faq-dir", default=FAQ_DIR)
+    build.add_argument("--batch-size", type=int, default=64)
+    build.add_argument("--keep", type=int, default=3, help="number of versions to keep")
+    build.add_argument("--force", action="store_true", help="re-embed every document")
+    build.add_argument(
+        "--index-type",
+        action="append",
+        choices=INDEX_TYPES,
+        default=None,
+        help="compressed serving variant to build (repeatable; default: the current "
+             "version's variants, 'flat' alone drops them)",
+    )
+    build.add_argument("--nlist", type=int, default=None, help="IVF lists (default ~4*sqrt(n))")
+    build.add_argument("--pq-m", type=int, default=DEFAULT_PQ_M)
+    build.add_argument("--pq-nbits", type=int, default=DEFAULT_PQ_NBITS)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build_index(
+            base_dir=args.vector_db,
+            faq_dir=args.faq_dir,
+            batch_size=args.batch_size,
+            force=args.force,
+            keep=args.keep,
+            index_types=args.index_type,
+            nlist=args.nlist,
+            pq_m=args.pq_m,
+            pq_nbits=args.pq_nbits,
+        )
+
+
+if __name__ == "__main__":
+    main()